@@ -11,6 +11,15 @@ then
     echo "PostgreSQL started"
 fi
 
+# Admin autodiscovery imports people.metrics, whose gauges open their files in
+# PROMETHEUS_MULTIPROC_DIR straight away, so it must exist before any manage.py
+# command runs (gunicorn's on_starting hook only clears it)
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]
+then
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
+python manage.py bootstrap_db
 python manage.py migrate
 python manage.py collectstatic --noinput
 
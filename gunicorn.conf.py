@@ -0,0 +1,65 @@
+"""
+Gunicorn settings for the production web container.
+
+WSGI (default):  gunicorn -c gunicorn.conf.py
+ASGI (uvicorn):  GUNICORN_APP=naft_khabar.asgi:application \
+                 GUNICORN_WORKER_CLASS=uvicorn_worker.UvicornWorker gunicorn -c gunicorn.conf.py
+
+Under ASGI the async lookups (/api/people/lookup/) wait on the event loop, so a
+few workers (GUNICORN_WORKERS=cpus) take large bursts. Every in-flight query
+still holds a connection: enable POSTGRES_POOL so its max size bounds them.
+Without the pool the ASGI app runs with CONN_MAX_AGE=0 (see settings).
+"""
+import multiprocessing
+import os
+
+wsgi_app = os.environ.get('GUNICORN_APP', 'naft_khabar.wsgi:application')
+bind = f"0.0.0.0:{os.environ.get('APP_PORT', '8001')}"
+
+# (2 x cores) + 1 processes; gthread workers add threads per process for I/O-bound
+# DB calls. Keep POSTGRES_POOL_MAX_SIZE >= threads when the DB pool is enabled.
+cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else multiprocessing.cpu_count()
+workers = int(os.environ.get('GUNICORN_WORKERS') or cpus * 2 + 1)
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+
+# Recycle workers periodically (jittered so they don't all restart together)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', '200'))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = 30
+keepalive = 5
+# Heartbeat files on tmpfs so a slow container disk can't stall workers
+worker_tmp_dir = '/dev/shm'
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+# With several worker processes, prometheus_client keeps per-process metric files
+# in PROMETHEUS_MULTIPROC_DIR. The master aggregates them on WEB_METRICS_PORT,
+# which only the compose network reaches; the public port has no /metrics.
+def on_starting(server):
+    metrics_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if metrics_dir:
+        os.makedirs(metrics_dir, exist_ok=True)
+        for name in os.listdir(metrics_dir):
+            os.remove(os.path.join(metrics_dir, name))
+
+
+def when_ready(server):
+    port = os.environ.get('WEB_METRICS_PORT')
+    if port and os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import CollectorRegistry, multiprocess, start_http_server
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        start_http_server(int(port), registry=registry)
+        server.log.info('Serving metrics on port %s', port)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'naft_khabar.settings')
+# Read by settings: persistent connections leak under ASGI (see DATABASES)
+os.environ['DJANGO_ASGI'] = '1'
 
 application = get_asgi_application()
@@ -0,0 +1,193 @@
+import logging
+import random
+import time
+import traceback
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+from prometheus_client import Counter, Histogram
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+logger = logging.getLogger('naft_khabar.sql')
+
+DB_QUERIES_PER_REQUEST = Histogram(
+    'django_db_queries_per_request',
+    'Database queries executed while handling one request, by view',
+    ['view'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    'django_db_time_per_request_seconds',
+    'Total database time spent while handling one request, by view',
+    ['view'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+SLOW_REQUESTS = Counter(
+    'django_slow_requests_total',
+    'Requests over the SQL_PROFILING query-count or latency threshold, by view',
+    ['view'],
+)
+
+_PROFILING_DEFAULTS = {
+    'HEADERS': True,
+    'QUERY_COUNT_THRESHOLD': 50,
+    'DURATION_MS_THRESHOLD': 500,
+    'SAMPLE_RATE': 0.05,
+}
+
+
+class QueryCounter:
+    """``connection.execute_wrapper`` hook that counts and times executed statements.
+
+    With ``capture`` set it also keeps each statement and the project frames that
+    issued it; that costs a stack walk per query, so only sampled requests do it.
+    """
+
+    def __init__(self, capture=False):
+        self.count = 0
+        self.duration = 0.0
+        self.capture = capture
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            if self.capture:
+                self.queries.append((elapsed, sql, _project_frames()))
+
+
+class QueryProfilingMiddleware:
+    """
+    Counts queries and DB time per request and reports them as Prometheus metrics
+    and X-DB-Queries / X-DB-Time-ms / Server-Timing headers. A SAMPLE_RATE share
+    of requests also records every statement with its call site; when such a
+    request crosses QUERY_COUNT_THRESHOLD or DURATION_MS_THRESHOLD it is logged
+    to the ``naft_khabar.sql`` logger. Unlike DEBUG query logging this stays cheap
+    enough to leave on in production.
+
+    Async-capable, so the async lookup views run without a thread switch
+    under ASGI. Connections belong to a thread, and the async ORM runs a
+    request's queries on its thread-sensitive executor thread, so there the
+    counter is installed on that thread's connection: two short hops per
+    request instead of running the whole view in a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        config = {**_PROFILING_DEFAULTS, **getattr(settings, 'SQL_PROFILING', {})}
+        self.headers = config['HEADERS']
+        self.query_threshold = config['QUERY_COUNT_THRESHOLD']
+        self.duration_threshold = config['DURATION_MS_THRESHOLD'] / 1000
+        self.sample_rate = config['SAMPLE_RATE']
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        counter = QueryCounter(capture=random.random() < self.sample_rate)
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        return self._record(request, response, counter, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        counter = QueryCounter(capture=random.random() < self.sample_rate)
+        started = time.perf_counter()
+        await sync_to_async(_add_wrapper)(counter)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(_remove_wrapper)(counter)
+        return self._record(request, response, counter, time.perf_counter() - started)
+
+    def _record(self, request, response, counter, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else '<unresolved>'
+        DB_QUERIES_PER_REQUEST.labels(view=view).observe(counter.count)
+        DB_TIME_PER_REQUEST.labels(view=view).observe(counter.duration)
+
+        if self.headers:
+            db_ms = counter.duration * 1000
+            response['X-DB-Queries'] = str(counter.count)
+            response['X-DB-Time-ms'] = f'{db_ms:.1f}'
+            response['Server-Timing'] = f'db;dur={db_ms:.1f}, total;dur={elapsed * 1000:.1f}'
+
+        if counter.count > self.query_threshold or elapsed > self.duration_threshold:
+            SLOW_REQUESTS.labels(view=view).inc()
+            if counter.capture:
+                self._log_slow_request(request, view, elapsed, counter)
+        return response
+
+    def _log_slow_request(self, request, view, elapsed, counter):
+        lines = [
+            f'{request.method} {request.get_full_path()} ({view}): '
+            f'{counter.count} queries, {counter.duration * 1000:.1f} ms in DB, {elapsed * 1000:.1f} ms total'
+        ]
+        for duration, sql, frames in counter.queries:
+            lines.append(f'  {duration * 1000:.2f} ms  {sql}')
+            lines.extend(f'      at {frame}' for frame in frames)
+        logger.warning('\n'.join(lines))
+
+
+# Run through sync_to_async: ``connection`` has to be looked up on the
+# executor thread, not on the event loop
+def _add_wrapper(wrapper):
+    connection.execute_wrappers.append(wrapper)
+
+
+def _remove_wrapper(wrapper):
+    connection.execute_wrappers.remove(wrapper)
+
+
+def _project_frames(limit=3):
+    # Innermost project frames that led to the query, skipping this module
+    frames = []
+    for frame in reversed(traceback.extract_stack()):
+        filename = frame.filename
+        if 'site-packages' in filename or filename == __file__:
+            continue
+        if not filename.startswith(str(settings.BASE_DIR)):
+            continue
+        frames.append(f'{filename}:{frame.lineno} in {frame.name}')
+        if len(frames) == limit:
+            break
+    return frames
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise, async-capable: under ASGI, requests that are not for a static
+    file go on to the async handler instead of through a sync_to_async thread
+    hop. Static files themselves are still served from a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            # Opens the file and stats it
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
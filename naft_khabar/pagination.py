@@ -1,3 +1,7 @@
+import json
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
@@ -13,3 +17,31 @@ class ConditionalPagination(PageNumberPagination):
 
     def get_paginated_response(self, data):
         return super().get_paginated_response(data)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Admin paginator that trusts the PostgreSQL planner's row estimate instead of
+    running COUNT(*) once a changelist is big enough that the exact number no
+    longer matters. Small or heavily filtered results still get an exact count.
+    """
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'query'):
+            return super().count
+        estimate = self._estimate_count()
+        if estimate < self.exact_count_threshold:
+            return super().count
+        return estimate
+
+    def _estimate_count(self):
+        queryset = self.object_list
+        sql, params = queryset.query.sql_with_params()
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
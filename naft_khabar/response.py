@@ -1,6 +1,11 @@
 from rest_framework.renderers import JSONRenderer
 from rest_framework.utils.serializer_helpers import ReturnList
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to DRF's stdlib encoder
+    orjson = None
+
 
 class CustomJSONRenderer(JSONRenderer):
     """
@@ -29,7 +34,7 @@ class CustomJSONRenderer(JSONRenderer):
                 }
 
             # Render the error response
-            return super(CustomJSONRenderer, self).render(errors, accepted_media_type, renderer_context)
+            return self.render_json(errors, accepted_media_type, renderer_context)
 
         # Handle normal data wrapping for successful responses
         if isinstance(data, dict) and 'results' in data:
@@ -42,5 +47,18 @@ class CustomJSONRenderer(JSONRenderer):
             # Non-paginated data; wrap in 'data'
             response_data = {'data': data}
 
-        # Call super to render the data into the content type specified by the renderer
-        return super(CustomJSONRenderer, self).render(response_data, accepted_media_type, renderer_context)
+        # Render the data into the content type specified by the renderer
+        return self.render_json(response_data, accepted_media_type, renderer_context)
+
+    def render_json(self, data, accepted_media_type=None, renderer_context=None):
+        # orjson is several times faster than json.dumps on large list pages.
+        # Indented (browsable/debug) output still goes through DRF's encoder.
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super(CustomJSONRenderer, self).render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z,
+        )
+        # Same escaping DRF applies: U+2028/U+2029 are valid JSON but not valid JavaScript.
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
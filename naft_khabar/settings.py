@@ -25,7 +25,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-lp9@@yfj=pnr$!4!9&#)o8z+)4m7aj(hrc)bhxa40ojxic4tsg'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# DEBUG also makes Django keep every executed SQL query in memory. Off unless
+# DEBUG=1 is set, as in a local .env (see .env.example).
+DEBUG = os.environ.get('DEBUG', 'False').lower() in ('1', 'true', 'yes')
 
 ALLOWED_HOSTS = ['admin.naftkhabar.com',
                  'dara.naftkhabar.com',
@@ -79,6 +81,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # Third-party apps
     'rest_framework',
@@ -87,6 +90,7 @@ INSTALLED_APPS = [
     'corsheaders',
     'rest_framework_simplejwt',
     'django_extensions',
+    'django_prometheus',
 
     # Custom Apps
     'accounts',
@@ -95,7 +99,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Must stay first/last so request latency covers the whole middleware stack
+    'django_prometheus.middleware.PrometheusBeforeMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Serves collected static files (compressed, with cache headers) from gunicorn;
+    # an async-capable WhiteNoiseMiddleware
+    'naft_khabar.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # Should come first
     'django.middleware.common.CommonMiddleware',
@@ -103,6 +112,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'naft_khabar.middleware.QueryProfilingMiddleware',
+    'django_prometheus.middleware.PrometheusAfterMiddleware',
 ]
 
 AUTH_USER_MODEL = 'accounts.User'
@@ -132,8 +143,9 @@ REST_FRAMEWORK = {
         'naft_khabar.response.CustomJSONRenderer',
     ),
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        # Sliding-window counters in THROTTLE_CACHE instead of per-client timestamp lists
+        'naft_khabar.throttling.AnonRateThrottle',
+        'naft_khabar.throttling.UserRateThrottle',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
@@ -160,42 +172,9 @@ WSGI_APPLICATION = 'naft_khabar.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-import psycopg2
-from django.db.utils import OperationalError
-
-# Database initialization with environment variables
-try:
-    conn = psycopg2.connect(
-        dbname=os.environ.get('POSTGRES_NAME', 'postgres'),  # Connect to default DB first
-        user=os.environ.get('POSTGRES_USER', 'postgres'),
-        password=os.environ.get('POSTGRES_PASSWORD', ''),
-        host=os.environ.get('POSTGRES_HOST', 'db'),
-        port=os.environ.get('POSTGRES_PORT', '5432')
-    )
-    conn.autocommit = True
-    
-    # Create database if not exists
-    with conn.cursor() as cursor:
-        cursor.execute(f"SELECT 1 FROM pg_database WHERE datname = '{os.environ.get('POSTGRES_NAME', 'naft_khabar')}'")
-        if not cursor.fetchone():
-            cursor.execute(f"CREATE DATABASE {os.environ.get('POSTGRES_NAME', 'naft_khabar')}")
-    
-    # Connect to target database to create schema
-    conn = psycopg2.connect(
-        dbname=os.environ.get('POSTGRES_NAME', 'naft_khabar'),
-        user=os.environ.get('POSTGRES_USER', 'postgres'),
-        password=os.environ.get('POSTGRES_PASSWORD', ''),
-        host=os.environ.get('POSTGRES_HOST', 'db'),
-        port=os.environ.get('POSTGRES_PORT', '5432')
-    )
-    conn.autocommit = True
-    with conn.cursor() as cursor:
-        cursor.execute("CREATE SCHEMA IF NOT EXISTS esmesh_chie")
-    conn.close()
-except OperationalError as e:
-    print(f"Database initialization error: {e}")
-except psycopg2.Error as e:
-    print(f"PostgreSQL error: {e}")
+# Settings import must stay side-effect free: creating the database and schema
+# is done once by `python manage.py bootstrap_db` (see entrypoint.sh).
+DATABASE_SCHEMA = os.environ.get('POSTGRES_SCHEMA', 'esmesh_chie')
 
 DATABASES = {
     'default': {
@@ -206,12 +185,78 @@ DATABASES = {
         'HOST': os.environ.get('POSTGRES_HOST', 'db'),
         'PORT': os.environ.get('POSTGRES_PORT', '5432'),
         'OPTIONS': {
-            'options': '-c search_path=esmesh_chie,public',
-            'client_encoding': 'UTF8'
-        }
+            'options': f'-c search_path={DATABASE_SCHEMA},public',
+            'client_encoding': 'UTF8',
+            # Fail fast instead of hanging for the TCP timeout when the DB is unreachable
+            'connect_timeout': int(os.environ.get('POSTGRES_CONNECT_TIMEOUT', '10')),
+        },
+        # Keep connections open between requests/chunks instead of paying the
+        # TCP + auth handshake every time; stale ones are health-checked on reuse.
+        'CONN_MAX_AGE': int(os.environ.get('POSTGRES_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# Optional connection pool (Django 5.1 + psycopg 3 with the "pool" extra).
+# Size it per process type: web and worker containers set their own limits.
+if os.environ.get('POSTGRES_POOL', 'False').lower() in ('1', 'true', 'yes'):
+    # The pool replaces persistent connections; Django requires CONN_MAX_AGE=0 with it
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('POSTGRES_POOL_MIN_SIZE', '2')),
+        'max_size': int(os.environ.get('POSTGRES_POOL_MAX_SIZE', '10')),
+        'timeout': int(os.environ.get('POSTGRES_POOL_TIMEOUT', '10')),
+    }
+elif os.environ.get('DJANGO_ASGI') == '1':
+    # Under ASGI the ORM runs on executor threads, each with its own
+    # connection that the end-of-request cleanup may never see: persistent
+    # connections pile up until max_connections. Django's deployment docs
+    # say to disable them there and use the pool instead
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+
+# Per-request SQL profiling (naft_khabar.middleware.QueryProfilingMiddleware)
+SQL_PROFILING = {
+    'HEADERS': os.environ.get('SQL_PROFILING_HEADERS', 'True').lower() in ('1', 'true', 'yes'),
+    'QUERY_COUNT_THRESHOLD': int(os.environ.get('SQL_SLOW_QUERY_COUNT', '50')),
+    'DURATION_MS_THRESHOLD': int(os.environ.get('SQL_SLOW_REQUEST_MS', '500')),
+    # Share of requests whose statements and call sites are captured for logging
+    'SAMPLE_RATE': float(os.environ.get('SQL_PROFILING_SAMPLE_RATE', '0.05')),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'verbose': {'format': '{asctime} {levelname} {name} {message}', 'style': '{'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'verbose'},
+    },
+    'loggers': {
+        'naft_khabar.sql': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+
+# Cache (instrumented so Prometheus gets hit/miss counters)
+CACHES = {
+    'default': {
+        'BACKEND': 'django_prometheus.cache.backends.locmem.LocMemCache',
     }
 }
 
+# Throttle counters must be shared by all worker processes; without a Redis
+# URL each process counts on its own (LocMem), so the effective limit is the
+# configured rate times the number of processes
+THROTTLE_CACHE = 'default'
+if os.environ.get('THROTTLE_REDIS_URL'):
+    CACHES['throttle'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['THROTTLE_REDIS_URL'],
+        'KEY_PREFIX': 'throttle',
+        'TIMEOUT': None,
+    }
+    THROTTLE_CACHE = 'throttle'
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -247,6 +292,17 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static_files')
 
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        # collectstatic writes .gz/.br siblings that WhiteNoise serves directly
+        'BACKEND': 'whitenoise.storage.CompressedStaticFilesStorage',
+    },
+}
+WHITENOISE_MAX_AGE = int(os.environ.get('STATIC_MAX_AGE', '86400'))
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
@@ -0,0 +1,78 @@
+import logging
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import throttling
+
+logger = logging.getLogger(__name__)
+
+
+class SlidingWindowThrottleMixin:
+    """
+    Sliding-window counter in place of SimpleRateThrottle's timestamp history.
+
+    Each client has one integer counter per fixed window of the rate's
+    duration; the request count over the last ``duration`` seconds is
+    estimated as the current window's count plus the previous window's,
+    weighted by how much of it still overlaps. State is two small integers per
+    client however high the rate, and the only write is an atomic incr(), so
+    no list is read, pickled and written back per request.
+
+    Counters live in the THROTTLE_CACHE alias, which must be shared between
+    processes (Redis) for the limits to hold across gunicorn workers. Requests
+    are counted before the check, so rejected requests also count. When the
+    cache is unreachable requests are let through rather than failed.
+    """
+
+    def get_cache(self):
+        return caches[getattr(settings, 'THROTTLE_CACHE', 'default')]
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window, self.elapsed = divmod(self.now, self.duration)
+        try:
+            self.current, self.previous = self._count(self.get_cache(), int(window))
+        except Exception as e:
+            logger.warning('Throttle cache unavailable, not throttling: %s', e)
+            return True
+
+        overlap = (self.duration - self.elapsed) / self.duration
+        if self.previous * overlap + self.current > self.num_requests:
+            return self.throttle_failure()
+        return True
+
+    def _count(self, cache, window):
+        current_key = f'{self.key}:{window}'
+        try:
+            current = cache.incr(current_key)
+        except ValueError:
+            # First request of the window. The counter outlives it by one
+            # window, for the weighted estimate of the next
+            if cache.add(current_key, 1, 2 * self.duration):
+                current = 1
+            else:
+                current = cache.incr(current_key)
+        return current, cache.get(f'{self.key}:{window - 1}', 0)
+
+    def wait(self):
+        """Seconds until the estimate drops back under the limit."""
+        remaining = self.duration - self.elapsed
+        if self.current > self.num_requests:
+            # Only after this window has closed and then decayed far enough
+            return remaining + self.duration * (1 - self.num_requests / self.current)
+        if not self.previous:
+            return remaining
+        return max(remaining - (self.num_requests - self.current) * self.duration / self.previous, 0)
+
+
+class AnonRateThrottle(SlidingWindowThrottleMixin, throttling.AnonRateThrottle):
+    pass
+
+
+class UserRateThrottle(SlidingWindowThrottleMixin, throttling.UserRateThrottle):
+    pass
@@ -42,3 +42,8 @@ urlpatterns = [
               ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+
+# Prometheus metrics: gunicorn serves them on the internal WEB_METRICS_PORT
+# (see gunicorn.conf.py); /metrics only exists on the development server
+if settings.DEBUG:
+    urlpatterns.append(path('', include('django_prometheus.urls')))
@@ -1,8 +1,16 @@
 from django.contrib import admin, messages
+from django.contrib.postgres.aggregates import StringAgg
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Subquery
 from django.urls import path
 from django import forms
 from django.shortcuts import redirect, render
-from .models import Person, CreditCard, PhoneNumber, Source, ImportJob, ImportJobStatus
+from django.utils import timezone
+from django.utils.html import format_html
+from .models import Person, CreditCard, PhoneNumber, PersonIdentity, Source, ImportJob, ImportJobStatus, ImportMode, ImportReader
+from .normalization import normalize_search_text
+from .readers import arrow_available, read_csv_chunks
+from naft_khabar.pagination import EstimatedCountPaginator
 import csv
 from datetime import datetime
 import os
@@ -12,14 +20,80 @@ import pandas as pd
 class ImportForm(forms.Form):
     file_path = forms.CharField(label='File path', max_length=500)
     source = forms.ChoiceField(choices=Source.choices)
+    mode = forms.ChoiceField(
+        choices=ImportMode.choices,
+        initial=ImportMode.MERGE,
+        help_text='Replace loads the file into a fresh copy of the source\'s data and swaps it in when every chunk is done',
+    )
+    reader = forms.ChoiceField(
+        choices=ImportReader.choices,
+        initial=ImportReader.PANDAS,
+        help_text='CSV parser; pyarrow parses on every core and skips unused columns',
+    )
+    defer_indexes = forms.BooleanField(
+        required=False,
+        label='Bulk load',
+        help_text='Merge only: drop the search indexes while the file is written and rebuild them concurrently afterwards; searches on every bank are slower meanwhile',
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        initial=True,
+        help_text='Profile the file first; start the job from Import jobs once the report looks right',
+    )
+
+    def clean_reader(self):
+        reader = self.cleaned_data['reader']
+        if reader == ImportReader.ARROW and not arrow_available():
+            raise forms.ValidationError('pyarrow is not installed on this server')
+        return reader
+
+
+class PersonSourceForm(forms.ModelForm):
+    # Cards and phones reference their person by (id, source)
+    def clean(self):
+        cleaned_data = super().clean()
+        person = cleaned_data.get('person')
+        source = cleaned_data.get('source')
+        if person is not None and source and source != person.source:
+            self.add_error('source', f"Must match the person's source ({person.source}).")
+        return cleaned_data
+
+
+class CreditCardForm(PersonSourceForm):
+    class Meta:
+        model = CreditCard
+        fields = '__all__'
 
 
 @admin.register(Person)
 class PersonAdmin(admin.ModelAdmin):
     list_display = ('id', 'first_name', 'last_name', 'national_code', 'birthdate', 'source')
     search_fields = ('first_name', 'last_name', 'national_code')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     change_list_template = 'admin/people/person/change_list.html'
 
+    def get_readonly_fields(self, request, obj=None):
+        # Cards and phones are tied to the person's source partition
+        if obj is not None:
+            return (*super().get_readonly_fields(request, obj), 'source')
+        return super().get_readonly_fields(request, obj)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Use the folded, trigram-indexed search_name column instead of
+        # ILIKE scans over first_name/last_name/national_code.
+        term = normalize_search_text(search_term)
+        if not term:
+            return queryset, False
+        if term.isdigit():
+            if len(term) == 10:
+                return queryset.filter(national_code=term), False
+            bounds = Person._meta.get_field('national_code').prefix_range(term)
+            if bounds is None:
+                return queryset.none(), False
+            return queryset.filter(national_code__range=bounds), False
+        return queryset.filter(search_name__contains=term), False
+
     def get_urls(self):
         urls = super().get_urls()
         custom_urls = [
@@ -38,11 +112,19 @@ class PersonAdmin(admin.ModelAdmin):
                 job = ImportJob.objects.create(
                     source=source,
                     file_path=file_path,
+                    mode=form.cleaned_data['mode'],
+                    reader=form.cleaned_data['reader'],
+                    defer_indexes=form.cleaned_data['defer_indexes'] and form.cleaned_data['mode'] == ImportMode.MERGE,
                     status=ImportJobStatus.PENDING
                 )
                 
                 # Queue import job in a new thread
                 import threading
+                if form.cleaned_data['dry_run']:
+                    thread = threading.Thread(target=preflight_job, args=(job.id,))
+                    thread.start()
+                    messages.success(request, f'Import job #{job.id} is being checked. Start it from Import jobs once it is Checked.')
+                    return redirect('..')
                 thread = threading.Thread(target=import_chunks, args=(job.id,))
                 thread.start()
                 
@@ -55,11 +137,50 @@ class PersonAdmin(admin.ModelAdmin):
 
 @admin.register(CreditCard)
 class CreditCardAdmin(admin.ModelAdmin):
+    form = CreditCardForm
     list_display = ('id', 'card_number', 'person', 'source')
+    list_select_related = ('person',)
     search_fields = ('card_number',)
-
-
-class PhoneNumberForm(forms.ModelForm):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # card_number is an integer column: a prefix becomes a range scan
+        # on uniq_creditcard_number_source instead of a cast-and-LIKE scan
+        term = ''.join(search_term.split())
+        if not term:
+            return queryset, False
+        bounds = CreditCard._meta.get_field('card_number').prefix_range(term)
+        if bounds is None:
+            return queryset.none(), False
+        return queryset.filter(card_number__range=bounds), False
+
+
+@admin.register(PersonIdentity)
+class PersonIdentityAdmin(admin.ModelAdmin):
+    list_display = ('national_code', 'first_name', 'birthdate', 'sources', 'card_count', 'phone_count', 'updated_at')
+    list_filter = ('source_count',)
+    search_fields = ('national_code',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        term = ''.join(search_term.split())
+        if not term:
+            return queryset, False
+        if not term.isdigit() or len(term) > 10:
+            return queryset.none(), False
+        return queryset.filter(national_code=term), False
+
+    # Derived from the per-bank tables by the importer
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class PhoneNumberForm(PersonSourceForm):
     numbers = forms.CharField(
         label='Phone Numbers',
         help_text='Enter one or more phone numbers separated by | character',
@@ -83,23 +204,88 @@ class PhoneNumberForm(forms.ModelForm):
 
 @admin.register(ImportJob)
 class ImportJobAdmin(admin.ModelAdmin):
-    list_display = ('id', 'source', 'file_path', 'status', 'progress_percentage', 'created_at')
-    list_filter = ('status', 'source')
-    readonly_fields = ('progress_percentage',)
+    list_display = ('id', 'source', 'mode', 'reader', 'defer_indexes', 'file_path', 'status', 'progress_percentage', 'created_at')
+    list_filter = ('status', 'source', 'mode', 'reader')
+    readonly_fields = ('progress_percentage', 'preflight_report')
+    exclude = ('preflight',)
     search_fields = ('file_path',)
+    actions = ['start_import', 'check_again']
     
     def progress_percentage(self, obj):
         return f"{obj.progress_percentage()}%"
     progress_percentage.short_description = 'Progress'
 
+    def preflight_report(self, obj):
+        if not obj.preflight:
+            return '-'
+        return format_html('<pre>{}</pre>', json.dumps(obj.preflight, indent=2, ensure_ascii=False))
+    preflight_report.short_description = 'Dry run report'
+
+    @admin.action(description='Start selected checked imports')
+    def start_import(self, request, queryset):
+        started = 0
+        for job in queryset.filter(status=ImportJobStatus.CHECKED):
+            # Claim the job before publishing: a double submit finds it no
+            # longer Checked and does not publish the file a second time
+            claimed = ImportJob.objects.filter(id=job.id, status=ImportJobStatus.CHECKED).update(
+                status=ImportJobStatus.PROCESSING, updated_at=timezone.now()
+            )
+            if not claimed:
+                continue
+            threading.Thread(target=import_chunks, args=(job.id,)).start()
+            started += 1
+        skipped = queryset.count() - started
+        self.message_user(request, f'{started} import(s) started, {skipped} skipped (only Checked jobs can start).')
+
+    @admin.action(description='Run the dry run again')
+    def check_again(self, request, queryset):
+        jobs = list(queryset.filter(status__in=[ImportJobStatus.PENDING, ImportJobStatus.CHECKED, ImportJobStatus.REJECTED]))
+        for job in jobs:
+            threading.Thread(target=preflight_job, args=(job.id,)).start()
+        self.message_user(request, f'{len(jobs)} job(s) are being checked.')
+
 @admin.register(PhoneNumber)
 class PhoneNumberAdmin(admin.ModelAdmin):
     form = PhoneNumberForm
     list_display = ('get_numbers', 'person', 'source')
+    list_select_related = ('person',)
     search_fields = ('number',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        match = request.resolver_match
+        if match is None or match.url_name != 'people_phonenumber_changelist':
+            return queryset
+        # The changelist shows one row per (person, source): the group's first
+        # number, annotated with all of the group's numbers in the same query.
+        group = PhoneNumber.objects.filter(person=OuterRef('person'), source=OuterRef('source'))
+        numbers = (
+            group.values('person', 'source')
+            .annotate(numbers=StringAgg('number', delimiter='|', ordering='id'))
+            .values('numbers')
+        )
+        return queryset.filter(
+            ~Exists(group.filter(id__lt=OuterRef('id')))
+        ).annotate(numbers=Subquery(numbers))
+
+    def get_search_results(self, request, queryset, search_term):
+        term = ''.join(ch for ch in search_term if ch.isdigit())
+        if not term:
+            return queryset, False
+        # Match the whole group when any of its numbers matches
+        matches = PhoneNumber.objects.filter(
+            person=OuterRef('person'),
+            source=OuterRef('source'),
+            number__contains=term,
+        )
+        return queryset.filter(Exists(matches)), False
 
     def get_numbers(self, obj):
         # Return all numbers for this person/source
+        if hasattr(obj, 'numbers'):
+            return obj.numbers
         numbers = PhoneNumber.objects.filter(
             person=obj.person,
             source=obj.source
@@ -112,19 +298,9 @@ class PhoneNumberAdmin(admin.ModelAdmin):
         numbers = form.cleaned_data.get('numbers', '').split('|')
         numbers = [n.strip() for n in numbers if n.strip()]
 
-        # Always delete existing numbers for this person/source
-        PhoneNumber.objects.filter(
-            person=obj.person,
-            source=obj.source
-        ).delete()
-
-        # Create new records for each number
-        for number in numbers:
-            PhoneNumber.objects.create(
-                number=number,
-                person=obj.person,
-                source=obj.source
-            )
+        # Apply only the added/removed numbers, atomically, so the person never
+        # appears without phones mid-save
+        sync_phone_numbers(obj.person, obj.source, numbers)
 
 
 # --- Importer utility for Melli CSV/XLSX schema ---
@@ -136,26 +312,39 @@ class PhoneNumberAdmin(admin.ModelAdmin):
 # - BIRTH_DATE format like YYYY-MM-DD; we try to parse, else store NULL.
 
 # Import RabbitMQ integration
-from .tasks import process_chunk
+from .tasks import finish_job, process_chunk, parse_mobiles, sync_phone_numbers
+from . import identity, indexes, metrics, partitions, preflight
+from .encoding import detect_encoding, fix_mojibake_column
 import pika
 import json
-import math
 import os
 import threading
 
-# Function to encode and decode a single string
-def encode_decode(value, source_encoding):
-    if pd.isna(value) or not isinstance(value, str):  # Handle None, NaN, or non-strings
-        return value
+def preflight_job(job_id):
+    """Dry run: profile the job's file and mark it CHECKED or REJECTED; nothing is published or written."""
+    job = ImportJob.objects.get(id=job_id)
     try:
-        return value.encode(source_encoding, errors='ignore').decode('utf-8', errors='ignore').strip()
-    except (UnicodeEncodeError, UnicodeDecodeError):
-        return value.strip()  # Return trimmed original if encoding fails
+        with metrics.STAGE_SECONDS.labels(stage='preflight').time():
+            report = preflight.scan_file(job.file_path)
+    except Exception as e:
+        job.status = ImportJobStatus.REJECTED
+        job.error_message = f'Dry run failed: {e}'
+        job.save(update_fields=['status', 'error_message', 'updated_at'])
+        raise
+    job.preflight = report
+    job.status = ImportJobStatus.CHECKED if report['accepted'] else ImportJobStatus.REJECTED
+    job.error_message = '; '.join(report['reasons']) or None
+    job.save(update_fields=['preflight', 'status', 'error_message', 'updated_at'])
+    return report
 
 def import_chunks(job_id):
     job = ImportJob.objects.get(id=job_id)
     try:
         job.status = ImportJobStatus.PROCESSING
+        # Stays 0 while chunks are published, so no worker finishes the job
+        # early; set to the number actually published once the file is read
+        job.total_chunks = 0
+        job.processed_chunks = 0
         job.save()
         
         # Connect to RabbitMQ
@@ -171,47 +360,44 @@ def import_chunks(job_id):
         connection = pika.BlockingConnection(parameters)
         channel = connection.channel()
         channel.queue_declare(queue='import_queue', durable=True)
+
+        if job.mode == ImportMode.REPLACE:
+            partitions.prepare_staging(job.source, job.id)
+        elif job.defer_indexes:
+            indexes.drop_deferrable_indexes()
         
         # Process file and send chunks to RabbitMQ
         _, ext = os.path.splitext(job.file_path.lower())
         chunk_size = 1000  # rows per chunk
+        published = 0
         
         if ext in ['.csv', '.txt']:
-            # Count total rows
-            with open(job.file_path, 'r', encoding='utf-8-sig', errors='ignore') as f:
-                total_rows = sum(1 for line in f) - 1  # Subtract header
-            
-            # Calculate total chunks
-            job.total_chunks = math.ceil(total_rows / chunk_size)
-            job.save()
-            
+            file_encoding = detect_encoding(job.file_path)
+
             # Process in chunks
-            for chunk_index, chunk in enumerate(pd.read_csv(
-                job.file_path,
-                chunksize=chunk_size,
-                header=0,
-                dtype=str,
-                keep_default_na=False,
-                encoding_errors='ignore'
-            )):
-                # Convert chunk to list of dictionaries
-                records = chunk.to_dict(orient='records')
+            for chunk_index, records in enumerate(
+                read_csv_chunks(job.file_path, chunk_size, file_encoding, reader=job.reader)
+            ):
                 chunk_data = {
                     'job_id': job_id,
                     'source': job.source,
                     'chunk_index': chunk_index,
-                    'total_chunks': job.total_chunks,
+                    # read_csv_chunks already repaired the names
+                    'repair_mojibake': False,
                     'rows': records
                 }
                 # Send chunk to RabbitMQ
-                channel.basic_publish(
-                    exchange='',
-                    routing_key='import_queue',
-                    body=json.dumps(chunk_data),
-                    properties=pika.BasicProperties(
-                        delivery_mode=2,  # make message persistent
+                with metrics.STAGE_SECONDS.labels(stage='publish').time():
+                    channel.basic_publish(
+                        exchange='',
+                        routing_key='import_queue',
+                        body=json.dumps(chunk_data),
+                        properties=pika.BasicProperties(
+                            delivery_mode=2,  # make message persistent
+                        )
                     )
-                )
+                metrics.CHUNKS_PUBLISHED.labels(source=job.source).inc()
+                published += 1
         
         elif ext in ['.xlsx', '.xlsm']:
             # Read entire Excel file
@@ -222,8 +408,10 @@ def import_chunks(job_id):
                 engine='openpyxl'
             )
             total_rows = len(df)
-            job.total_chunks = math.ceil(total_rows / chunk_size)
-            job.save()
+            # Cells are already text; only double-encoded names need work
+            if 'FULL_NAME' in df:
+                with metrics.STAGE_SECONDS.labels(stage='repair').time():
+                    df['FULL_NAME'] = fix_mojibake_column(df['FULL_NAME'])
             
             # Process in chunks
             for i in range(0, total_rows, chunk_size):
@@ -233,53 +421,68 @@ def import_chunks(job_id):
                     'job_id': job_id,
                     'source': job.source,
                     'chunk_index': i // chunk_size,
-                    'total_chunks': job.total_chunks,
+                    'repair_mojibake': False,
                     'rows': records
                 }
                 # Send chunk to RabbitMQ
-                channel.basic_publish(
-                    exchange='',
-                    routing_key='import_queue',
-                    body=json.dumps(chunk_data),
-                    properties=pika.BasicProperties(
-                        delivery_mode=2,  # make message persistent
+                with metrics.STAGE_SECONDS.labels(stage='publish').time():
+                    channel.basic_publish(
+                        exchange='',
+                        routing_key='import_queue',
+                        body=json.dumps(chunk_data),
+                        properties=pika.BasicProperties(
+                            delivery_mode=2,  # make message persistent
+                        )
                     )
-                )
+                metrics.CHUNKS_PUBLISHED.labels(source=job.source).inc()
+                published += 1
         
         else:
             raise ValueError('Unsupported file extension. Use .csv or .xlsx')
         
         connection.close()
-        return job.total_chunks
+
+        if not published and job.mode == ImportMode.REPLACE:
+            # Swapping in nothing would empty the source
+            raise ValueError('The file has no rows to import')
+        # The row lock is the one process_chunk counts under: either the
+        # last worker sees the total, or the workers have caught up here
+        with transaction.atomic():
+            counted = ImportJob.objects.select_for_update().only('processed_chunks', 'status').get(id=job.id)
+            counted.total_chunks = published
+            counted.save(update_fields=['total_chunks', 'updated_at'])
+        if counted.processed_chunks == published and counted.status == ImportJobStatus.PROCESSING:
+            finish_job(job)
+        return published
         
     except Exception as e:
-        job.status = ImportJobStatus.FAILED
-        job.error_message = str(e)
-        job.save()
+        # A worker may already have failed the job and cleaned up
+        failed = ImportJob.objects.filter(id=job.id, status=ImportJobStatus.PROCESSING).update(
+            status=ImportJobStatus.FAILED, error_message=str(e), updated_at=timezone.now()
+        )
+        if failed and job.mode == ImportMode.REPLACE:
+            partitions.drop_staging(job.source, job.id)
+        elif failed and job.defer_indexes:
+            indexes.rebuild_deferrable_indexes()
         raise
 
 
 def _open_rows(file_path):
     _, ext = os.path.splitext(file_path.lower())
     if ext in ['.csv', '.txt']:
-        encodings = [
-            'latin-1',
-            'utf-8-sig',
-            'utf-8',
-            'windows-1256',
-            'cp1256',
-        ]
-        last_err = None
-        for enc in encodings:
-            try:
-                df = pd.read_csv(file_path, encoding_errors='ignore', dtype=str, keep_default_na=False)
-                # Ensure strings and trimmed
-                # df = df.apply(lambda col: col.map(lambda v: encode_decode(v, enc)) if col.dtype == "object" else col)                # df = df.applymap(lambda v: (str(v).strip() if v is not None else ''))
-                rows = [list(df.columns)] + df.values.tolist()
-                return rows
-            except Exception as e:
-                last_err = e
-        raise ValueError(f'Unable to read CSV with supported encodings: {last_err}')
+        file_encoding = detect_encoding(file_path)
+        try:
+            df = pd.read_csv(
+                file_path,
+                encoding=file_encoding.encoding,
+                encoding_errors='replace',
+                dtype=str,
+                keep_default_na=False,
+            )
+        except Exception as e:
+            raise ValueError(f'Unable to read CSV as {file_encoding.encoding}: {e}')
+        rows = [list(df.columns)] + df.values.tolist()
+        return rows
     elif ext in ['.xlsx', '.xlsm']:
         raise NotImplementedError
         try:
@@ -307,19 +510,7 @@ def _normalize_card(card_raw: str) -> str:
     return value
 
 
-def _fix_mojibake_text(value: str) -> str:
-    """Fix common mojibake where UTF-8 bytes were decoded as latin-1 producing characters like 'Ø¹'.
-    If that pattern is detected, try to re-decode via latin-1 -> utf-8.
-    """
-    if not value:
-        return value
-    try:
-        return value.encode('windows-1252').decode('utf-8')
-    except Exception:
-        return value
-
-
-def import_melli_file(file_path: str, source: str) -> tuple[int, int]:
+def import_melli_file(file_path: str, source: str, reader: str = ImportReader.PANDAS) -> tuple[int, int]:
     inserted = 0
     updated = 0
     _, ext = os.path.splitext(file_path.lower())
@@ -327,8 +518,9 @@ def import_melli_file(file_path: str, source: str) -> tuple[int, int]:
     try:
         # Process CSV files in chunks
         if ext in ['.csv', '.txt']:
+            file_encoding = detect_encoding(file_path)
             # Detect header row by reading first row
-            with open(file_path, 'r', encoding='utf-8-sig', errors='ignore') as f:
+            with open(file_path, 'r', encoding=file_encoding.encoding, errors='replace') as f:
                 first_line = f.readline().strip()
             has_header = any(
                 word in first_line.upper() 
@@ -337,21 +529,17 @@ def import_melli_file(file_path: str, source: str) -> tuple[int, int]:
             
             # Process in chunks of 10,000 rows
             chunk_size = 10000
-            for chunk in pd.read_csv(
-                file_path,
-                chunksize=chunk_size,
-                header=0 if has_header else None,
-                dtype=str,
-                keep_default_na=False,
-                encoding_errors='ignore'
+            # Columns are taken by position, header or not
+            for records in read_csv_chunks(
+                file_path, chunk_size, file_encoding, reader=reader, by_position=True, header=has_header
             ):
-                for _, row in chunk.iterrows():
-                    row = row.tolist()
-                    national_code = (row[0] or '').strip() if len(row) > 0 else ''
-                    card_no_raw = row[1] if len(row) > 1 else ''
-                    full_name = _fix_mojibake_text((row[2] or '').strip()) if len(row) > 2 else ''
-                    birth_date_raw = (row[3] or '').strip() if len(row) > 3 else ''
-                    mobile_raw = (row[4] or '').strip() if len(row) > 4 else ''
+                codes = set()
+                for row in records:
+                    national_code = (row.get('NATIONAL_CODE') or '').strip()
+                    card_no_raw = row.get('CARD_NO') or ''
+                    full_name = (row.get('FULL_NAME') or '').strip()
+                    birth_date_raw = (row.get('BIRTH_DATE') or '').strip()
+                    mobile_raw = (row.get('MOBILE') or '').strip()
 
                     first_name = ''
                     last_name = ''
@@ -369,7 +557,7 @@ def import_melli_file(file_path: str, source: str) -> tuple[int, int]:
 
                     card_number = _normalize_card(card_no_raw)
 
-                    if not national_code:
+                    if not national_code or not national_code.isdigit():
                         continue
 
                     if len(national_code) > 10:
@@ -392,6 +580,7 @@ def import_melli_file(file_path: str, source: str) -> tuple[int, int]:
                     )
                     inserted += 1 if created else 0
                     updated += 0 if created else 1
+                    codes.add(national_code)
 
                     if card_number:
                         CreditCard.objects.update_or_create(
@@ -401,18 +590,10 @@ def import_melli_file(file_path: str, source: str) -> tuple[int, int]:
                         )
 
                     if mobile_raw:
-                        mobiles = mobile_raw.split('|')
-                        for mobile in mobiles:
-                            mobile = ''.join(ch for ch in mobile if ch.isdigit())
-                            if mobile:
-                                if mobile[0] != '0':
-                                    mobile = '0' + mobile
-                                PhoneNumber.objects.update_or_create(
-                                    number=mobile,
-                                    person=person,
-                                    source=source,
-                                    defaults={}
-                                )
+                        sync_phone_numbers(person, source, parse_mobiles(mobile_raw), remove_missing=False)
+
+                # Only the identities this chunk touched, not the whole source
+                identity.refresh_identities(codes)
 
         # Handle Excel files in chunks
         elif ext in ['.xlsx', '.xlsm']:
@@ -424,11 +605,14 @@ def import_melli_file(file_path: str, source: str) -> tuple[int, int]:
                 keep_default_na=False,
                 engine='openpyxl'
             ):
+                if chunk.shape[1] > 2:
+                    chunk.iloc[:, 2] = fix_mojibake_column(chunk.iloc[:, 2])
+                codes = set()
                 for _, row in chunk.iterrows():
                     row = row.tolist()
                     national_code = (row[0] or '').strip() if len(row) > 0 else ''
                     card_no_raw = row[1] if len(row) > 1 else ''
-                    full_name = _fix_mojibake_text((row[2] or '').strip()) if len(row) > 2 else ''
+                    full_name = (row[2] or '').strip() if len(row) > 2 else ''
                     birth_date_raw = (row[3] or '').strip() if len(row) > 3 else ''
                     mobile_raw = (row[4] or '').strip() if len(row) > 4 else ''
 
@@ -448,7 +632,7 @@ def import_melli_file(file_path: str, source: str) -> tuple[int, int]:
 
                     card_number = _normalize_card(card_no_raw)
 
-                    if not national_code:
+                    if not national_code or not national_code.isdigit():
                         continue
 
                     if len(national_code) > 10:
@@ -471,6 +655,7 @@ def import_melli_file(file_path: str, source: str) -> tuple[int, int]:
                     )
                     inserted += 1 if created else 0
                     updated += 0 if created else 1
+                    codes.add(national_code)
 
                     if card_number:
                         CreditCard.objects.update_or_create(
@@ -480,22 +665,14 @@ def import_melli_file(file_path: str, source: str) -> tuple[int, int]:
                         )
 
                     if mobile_raw:
-                        mobiles = mobile_raw.split('|')
-                        for mobile in mobiles:
-                            mobile = ''.join(ch for ch in mobile if ch.isdigit())
-                            if mobile:
-                                if mobile[0] != '0':
-                                    mobile = '0' + mobile
-                                PhoneNumber.objects.update_or_create(
-                                    number=mobile,
-                                    person=person,
-                                    source=source,
-                                    defaults={}
-                                )
+                        sync_phone_numbers(person, source, parse_mobiles(mobile_raw), remove_missing=False)
+
+                # Only the identities this chunk touched, not the whole source
+                identity.refresh_identities(codes)
                 
         else:
             raise ValueError('Unsupported file extension. Use .csv or .xlsx')
-        
+
         return inserted, updated
     except Exception as e:
         print(e)
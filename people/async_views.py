@@ -0,0 +1,122 @@
+import functools
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+from naft_khabar.response import CustomJSONRenderer
+from .models import CreditCard, Person, PersonIdentity, PhoneNumber
+from .serializers import (
+    CreditCardSerializer, PersonIdentitySerializer, PersonSerializer, PhoneNumberSerializer, represent_datetimes,
+)
+
+# Identifier lookups as plain async views. Under ASGI (see gunicorn.conf.py)
+# a request waiting on the cache or the database does not hold a worker
+# thread, so a few processes can keep thousands of lookups in flight. The
+# ORM's async methods still run each query in a thread of its own for the
+# duration of the query; the DRF viewsets stay sync and unchanged.
+#
+# Responses have the same JSON shape as the matching DRF endpoints and are
+# cached, rendered, for LOOKUP_CACHE_SECONDS: an import becomes visible here
+# that much later.
+#
+# They are not DRF views, so throttled() applies the DRF throttles
+# (DEFAULT_THROTTLE_CLASSES, the same counters as the viewsets) itself.
+
+LOOKUP_CACHE_SECONDS = 30
+
+_renderer = CustomJSONRenderer()
+
+
+def throttled(view):
+    """Answer 429 like a DRF view when any default throttle refuses the request."""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            # The throttle cache is sync; the check runs in the executor thread
+            await sync_to_async(_check_throttles)(request)
+        except exceptions.APIException as exc:
+            return _error_response(exc)
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def _check_throttles(request):
+    # APIView.check_throttles, with the client identified by the same
+    # authenticators as on the viewsets
+    request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    waits = []
+    for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+        throttle = throttle_class()
+        if not throttle.allow_request(request, None):
+            waits.append(throttle.wait())
+    if waits:
+        raise exceptions.Throttled(max((wait for wait in waits if wait is not None), default=None))
+
+
+def _error_response(exc):
+    error = exception_handler(exc, {})
+    body = _renderer.render(error.data, renderer_context={'response': error})
+    response = HttpResponse(body, status=error.status_code, content_type='application/json')
+    if 'Retry-After' in error:
+        response['Retry-After'] = error['Retry-After']
+    return response
+
+
+@throttled
+async def person_lookup(request, national_code):
+    """Every bank's row for a national code (like /users/?national_code=, unpaginated)."""
+    async def rows():
+        queryset = Person.objects.filter(national_code=national_code).order_by('id')
+        return represent_datetimes(PersonSerializer, [row async for row in queryset.values(*PersonSerializer.Meta.fields)])
+    return await _cached(f'people:{int(national_code)}', rows)
+
+
+@throttled
+async def card_lookup(request, card_number):
+    async def rows():
+        queryset = CreditCard.objects.filter(card_number=card_number).order_by('id')
+        return represent_datetimes(
+            CreditCardSerializer, [row async for row in queryset.values(*CreditCardSerializer.Meta.fields)]
+        )
+    return await _cached(f'cards:{int(card_number)}', rows)
+
+
+@throttled
+async def phone_lookup(request, number):
+    async def rows():
+        queryset = PhoneNumber.objects.filter(number=number).order_by('id')
+        return represent_datetimes(
+            PhoneNumberSerializer, [row async for row in queryset.values(*PhoneNumberSerializer.Meta.fields)]
+        )
+    return await _cached(f'phones:{number}', rows)
+
+
+@throttled
+async def identity_lookup(request, national_code):
+    async def row():
+        try:
+            found = await PersonIdentity.objects.values(*PersonIdentitySerializer.Meta.fields).aget(
+                national_code=national_code
+            )
+        except PersonIdentity.DoesNotExist:
+            return None
+        return represent_datetimes(PersonIdentitySerializer, [found])[0]
+    return await _cached(f'identity:{int(national_code)}', row)
+
+
+async def _cached(key, load):
+    key = f'lookup:{key}'
+    cached = await cache.aget(key)
+    if cached is None:
+        data = await load()
+        if data is None:
+            cached = (404, _renderer.render_json({'error': {'detail': 'Not found.'}}))
+        else:
+            cached = (200, _renderer.render_json({'data': data}))
+        await cache.aset(key, cached, LOOKUP_CACHE_SECONDS)
+    status, body = cached
+    return HttpResponse(body, status=status, content_type='application/json')
+
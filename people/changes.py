@@ -0,0 +1,68 @@
+import heapq
+from django.db import connection
+from django.db.models import F, Q
+from .models import Tombstone
+
+# Incremental sync for replicas of persons, cards and phone numbers.
+#
+# A row's version is the id of the last transaction that changed it (set by
+# the triggers of migration 0014), and deletions leave a Tombstone with the
+# deleting transaction's id. Transactions commit out of id order, so a read
+# only returns versions below the oldest transaction still running: nothing
+# can appear below that line later. Pages are keyed on (version, id).
+#
+# A replica follows ``next`` until it is null and keeps the final ``version``
+# as its next ``since``. A tombstone without an id means a REPLACE import
+# swapped in the whole source: the replica drops its rows of that source and
+# downloads them again (?source=...&all_data), then carries on from its
+# version as usual.
+
+PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+
+
+def watermark():
+    """Versions below this are final: every transaction that could still write one has ended."""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint')
+        return cursor.fetchone()[0]
+
+
+def read_changes(queryset, fields, since, after=None, limit=PAGE_SIZE, source=None):
+    """One page of changes to ``queryset`` at or after ``since``.
+
+    ``after`` is the id the previous page stopped at within version ``since``.
+    Returns ``(rows, deleted, cursor)``; cursor is the ``(since, after)`` of
+    the next page, with ``after`` None once the page reached the watermark.
+    """
+    upper = watermark()
+    window = Q(version__gte=since, version__lt=upper)
+    rows = queryset.filter(window)
+    deleted = Tombstone.objects.filter(window, resource=queryset.model._meta.model_name)
+    if after is not None:
+        rows = rows.filter(Q(version__gt=since) | Q(id__gt=after))
+        deleted = deleted.filter(Q(version__gt=since) | Q(object_id__gt=after))
+    if source is not None:
+        deleted = deleted.filter(source=source)
+
+    rows = list(rows.order_by('version', 'id').values(*fields)[:limit])
+    deleted = list(
+        deleted.order_by('version', F('object_id').asc(nulls_first=True))
+        .values('object_id', 'source', 'version')[:limit]
+    )
+    # Source-wide tombstones sort first within their version
+    page = list(heapq.merge(
+        ((row['version'], row['id'], row, False) for row in rows),
+        ((row['version'], -1 if row['object_id'] is None else row['object_id'], row, True) for row in deleted),
+        key=lambda entry: entry[:2],
+    ))
+    if len(page) <= limit and len(rows) < limit and len(deleted) < limit:
+        cursor = (max(upper, since), None)
+    else:
+        page = page[:limit]
+        cursor = page[-1][:2]
+    return (
+        [row for _, _, row, dead in page if not dead],
+        [{'id': row['object_id'], 'source': row['source'], 'version': row['version']} for _, _, row, dead in page if dead],
+        cursor,
+    )
@@ -0,0 +1,89 @@
+import codecs
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+# Bank dumps arrive in one of three shapes:
+#   * UTF-8 (optionally with a BOM)
+#   * Windows-1256, the Arabic/Persian ANSI code page
+#   * double-encoded UTF-8: UTF-8 bytes that were decoded as Windows-1252 and
+#     saved as UTF-8 again, so names read like 'ØºÙ„Ø§Ù…' (see mojibake.txt)
+# detect_encoding() settles this once per file from a sample, instead of
+# guessing per row.
+
+SAMPLE_BYTES = 4 * 1024 * 1024
+
+
+def _cp1252_char(byte):
+    # Bytes cp1252 leaves undefined come through as the matching C1 control
+    try:
+        return bytes([byte]).decode('cp1252')
+    except UnicodeDecodeError:
+        return chr(byte)
+
+
+# Arabic-script letters (U+0600-U+06FF) are 0xD8-0xDB followed by a
+# continuation byte in UTF-8; after a Windows-1252 round trip those pairs
+# become e.g. 'Ø¹' or 'Ù„'. Clean Persian text never contains them.
+_LEAD_CHARS = ''.join(_cp1252_char(b) for b in range(0xD8, 0xDC))
+_CONTINUATION_CHARS = ''.join(_cp1252_char(b) for b in range(0x80, 0xC0))
+MOJIBAKE_RE = re.compile(f'[{re.escape(_LEAD_CHARS)}][{re.escape(_CONTINUATION_CHARS)}]')
+
+# Windows-1252 character -> the byte it came from, as a latin-1 code point.
+# Covers the C1 controls cp1252 leaves undefined (0x81, 0x8D, 0x8F, 0x90,
+# 0x9D): 'ف' is D9 81 in UTF-8, so a plain .encode('cp1252') fails on it.
+_TO_BYTES = {ord(_cp1252_char(b)): b for b in range(0x80, 0xA0)}
+
+
+@dataclass(frozen=True)
+class FileEncoding:
+    encoding: str
+    # Text columns hold double-encoded UTF-8 and need fix_mojibake
+    repair_mojibake: bool = False
+
+
+def sniff_bytes(sample: bytes) -> FileEncoding:
+    """Decide the encoding of a file from its first bytes."""
+    if sample.startswith(codecs.BOM_UTF8):
+        encoding = 'utf-8-sig'
+    else:
+        encoding = 'utf-8'
+    try:
+        # final=False: the sample may end in the middle of a character
+        text = codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+    except UnicodeDecodeError:
+        # Not UTF-8; every byte is defined in Windows-1256, so it always decodes
+        return FileEncoding('cp1256')
+    return FileEncoding(encoding, repair_mojibake=bool(MOJIBAKE_RE.search(text)))
+
+
+def detect_encoding(path, sample_bytes=SAMPLE_BYTES) -> FileEncoding:
+    with open(path, 'rb') as f:
+        return sniff_bytes(f.read(sample_bytes))
+
+
+@lru_cache(maxsize=65536)
+def _repair(value):
+    try:
+        return value.translate(_TO_BYTES).encode('latin-1').decode('utf-8')
+    except UnicodeError:
+        # Mixed or genuinely Latin text: leave it alone
+        return value
+
+
+def fix_mojibake(value):
+    """Undo a UTF-8 -> Windows-1252 round trip; clean values are returned untouched."""
+    if not value or not MOJIBAKE_RE.search(value):
+        return value
+    # Memoized: the same first names repeat across millions of rows
+    return _repair(value)
+
+
+def fix_mojibake_column(values):
+    """fix_mojibake over a pandas Series of names (missing cells are skipped).
+
+    A plain map beats a vectorized str.contains mask here: object columns are
+    matched in Python either way, and the pre-check and cache already make
+    clean and repeated names cheap.
+    """
+    return values.map(fix_mojibake, na_action='ignore')
@@ -0,0 +1,225 @@
+import gzip
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connection, connections, transaction
+from .models import CreditCard, Person, PhoneNumber, Source
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from pyarrow import csv as pa_csv
+except ImportError:  # pyarrow is optional; only Parquet output needs it
+    pa = None
+
+# Bulk export of one source: a row per person with their cards and mobile
+# numbers joined in ('|'-separated, as in the bank files), straight from
+# COPY (SELECT ...) TO STDOUT. The person id range is cut into parts that
+# worker threads copy over their own connections. All of them read one
+# exported snapshot (pg_export_snapshot), so the parts are consistent with
+# each other even while an import runs. Rows stream from the server into a
+# compressor and onto disk; nothing holds more than a buffer of a part.
+#
+# CSV parts are gzip members, concatenated in order into one .csv.gz (a
+# valid gzip file). Parquet parts stay separate files of one dataset
+# directory, which pandas, pyarrow and DuckDB read as a single table.
+
+FORMATS = ('csv', 'parquet')
+COMPRESSION = {'csv': ('gzip', 'none'), 'parquet': ('zstd', 'snappy', 'gzip', 'none')}
+
+# Parts per worker, so one slow id range does not leave the others idle
+PARTS_PER_WORKER = 4
+
+COPY_BUFFER_BYTES = 1024 * 1024
+ARROW_BLOCK_BYTES = 8 * 1024 * 1024
+
+if pa is not None:
+    SCHEMA = pa.schema([
+        ('id', pa.int64()),
+        ('national_code', pa.string()),
+        ('first_name', pa.string()),
+        ('last_name', pa.string()),
+        ('birthdate', pa.date32()),
+        ('source', pa.string()),
+        ('cards', pa.string()),
+        ('mobiles', pa.string()),
+        ('version', pa.int64()),
+        ('updated_at', pa.timestamp('us', tz='UTC')),
+    ])
+
+
+def parquet_available():
+    return pa is not None
+
+
+def export_source(source, output, fmt='csv', compression=None, workers=4):
+    """Write ``source``'s people to ``output``; returns a report dict."""
+    if source not in Source.values:
+        raise ValueError(f'Unknown source: {source!r}')
+    if fmt not in FORMATS:
+        raise ValueError(f'Unknown format: {fmt!r}')
+    compression = compression or COMPRESSION[fmt][0]
+    if compression not in COMPRESSION[fmt]:
+        raise ValueError(f'{fmt} output supports {", ".join(COMPRESSION[fmt])} compression')
+    if fmt == 'parquet' and not parquet_available():
+        raise ValueError('Parquet output needs the pyarrow package installed')
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Held open until every worker has copied its part
+        cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+        cursor.execute('SELECT pg_export_snapshot()')
+        snapshot = cursor.fetchone()[0]
+        cursor.execute(
+            f'SELECT min(id), max(id) FROM {connection.ops.quote_name(Person._meta.db_table)} WHERE source = %s',
+            [source],
+        )
+        low, high = cursor.fetchone()
+        ranges = _id_ranges(low, high, workers * PARTS_PER_WORKER)
+        part_paths = [_part_path(output, fmt, i) for i in range(len(ranges))]
+        if fmt == 'parquet':
+            os.makedirs(output, exist_ok=True)
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                rows = list(pool.map(
+                    lambda job: _export_part(snapshot, source, *job, fmt, compression),
+                    [(i, low, high, path) for i, ((low, high), path) in enumerate(zip(ranges, part_paths))],
+                ))
+        except BaseException:
+            for path in part_paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+
+    if fmt == 'csv':
+        _concatenate(part_paths, output)
+        size = os.path.getsize(output)
+    else:
+        size = sum(os.path.getsize(path) for path in part_paths)
+    return {
+        'source': source,
+        'format': fmt,
+        'compression': compression,
+        'output': output,
+        'parts': len(ranges),
+        'rows': sum(rows),
+        'bytes': size,
+    }
+
+
+def _id_ranges(low, high, count):
+    """Up to ``count`` inclusive (low, high) id ranges covering low..high."""
+    if low is None:
+        # No rows: one empty part still gives the CSV its header
+        return [(0, -1)]
+    step = max(-(-(high - low + 1) // count), 1)
+    return [(start, min(start + step - 1, high)) for start in range(low, high + 1, step)]
+
+
+def _part_path(output, fmt, index):
+    if fmt == 'parquet':
+        return os.path.join(output, f'part-{index:05d}.parquet')
+    return f'{output}.part{index:05d}'
+
+
+def _export_part(snapshot, source, index, low, high, path, fmt, compression):
+    conn = connections['default']
+    try:
+        with transaction.atomic(), conn.cursor() as cursor:
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+            cursor.execute('SET TRANSACTION SNAPSHOT %s', [snapshot])
+            if fmt == 'csv':
+                sql = _copy_sql(conn, source, low, high, header=index == 0)
+                with _open_csv(path, compression) as f:
+                    return _copy_to(cursor, sql, f)
+            return _copy_to_parquet(cursor, _copy_sql(conn, source, low, high, header=True), path, compression)
+    finally:
+        # Worker threads do not go through the request cycle that closes connections
+        conn.close()
+
+
+def _open_csv(path, compression):
+    if compression == 'gzip':
+        # Level 6 is gzip's default; the compressor releases the GIL, so parts
+        # compress in parallel
+        return gzip.open(path, 'wb', compresslevel=6)
+    return open(path, 'wb')
+
+
+def _copy_sql(conn, source, low, high, header):
+    qn = conn.ops.quote_name
+    # COPY takes no bind parameters; source is a Source value, the bounds ints
+    source = f"'{Source(source).value}'"
+    low, high = int(low), int(high)
+    return (
+        'COPY (SELECT p.id, lpad(p.national_code::text, 10, \'0\') AS national_code, p.first_name, p.last_name, '
+        'p.birthdate, p.source, c.cards, m.mobiles, p.version, p.updated_at '
+        f'FROM {qn(Person._meta.db_table)} p '
+        "LEFT JOIN (SELECT person_id, string_agg(lpad(card_number::text, 16, '0'), '|' ORDER BY id) AS cards "
+        f'FROM {qn(CreditCard._meta.db_table)} WHERE source = {source} AND person_id BETWEEN {low} AND {high} '
+        'GROUP BY person_id) c ON c.person_id = p.id '
+        "LEFT JOIN (SELECT person_id, string_agg(number, '|' ORDER BY id) AS mobiles "
+        f'FROM {qn(PhoneNumber._meta.db_table)} WHERE source = {source} AND person_id BETWEEN {low} AND {high} '
+        'GROUP BY person_id) m ON m.person_id = p.id '
+        f'WHERE p.source = {source} AND p.id BETWEEN {low} AND {high}'
+        f") TO STDOUT WITH (FORMAT csv, HEADER {'true' if header else 'false'})"
+    )
+
+
+def _copy_to(cursor, sql, f):
+    """Stream COPY ... TO STDOUT into the binary file ``f``; returns the row count."""
+    raw = cursor.cursor
+    if hasattr(raw, 'copy'):  # psycopg 3
+        with raw.copy(sql) as copy:
+            for data in copy:
+                f.write(data)
+    else:  # psycopg2
+        raw.copy_expert(sql, f, size=COPY_BUFFER_BYTES)
+    return raw.rowcount
+
+
+def _copy_to_parquet(cursor, sql, path, compression):
+    # COPY writes CSV into a pipe on this thread's behalf while Arrow parses
+    # it in blocks and appends row groups, so a part is never held in memory
+    read_fd, write_fd = os.pipe()
+    result = {}
+
+    def produce():
+        try:
+            with open(write_fd, 'wb') as f:
+                _copy_to(cursor, sql, f)
+        except BaseException as e:
+            result['error'] = e
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    rows = 0
+    try:
+        with open(read_fd, 'rb') as f:
+            reader = pa_csv.open_csv(
+                f,
+                read_options=pa_csv.ReadOptions(block_size=ARROW_BLOCK_BYTES, column_names=SCHEMA.names, skip_rows=1),
+                convert_options=pa_csv.ConvertOptions(
+                    column_types=SCHEMA,
+                    # COPY writes NULL unquoted and an empty string as ""
+                    strings_can_be_null=True,
+                    quoted_strings_can_be_null=False,
+                ),
+            )
+            with pq.ParquetWriter(path, SCHEMA, compression=compression) as writer:
+                for batch in reader:
+                    writer.write_batch(batch)
+                    rows += batch.num_rows
+    finally:
+        producer.join()
+    if 'error' in result:
+        raise result['error']
+    return rows
+
+
+def _concatenate(part_paths, output):
+    with open(output, 'wb') as out:
+        for path in part_paths:
+            with open(path, 'rb') as f:
+                shutil.copyfileobj(f, out, COPY_BUFFER_BYTES)
+            os.remove(path)
@@ -0,0 +1,84 @@
+from django import forms
+from django.core.validators import RegexValidator
+from django.db import models
+
+
+class ZeroPaddedDigitsField(models.BigIntegerField):
+    """
+    A fixed-width digit string (national code, card number) stored as bigint.
+
+    The database holds 8 bytes instead of a varchar of up to 17; Python code,
+    forms and the API always see the zero-padded string, so '0012345678'
+    round-trips unchanged. Prefix searches must use prefix_range() since
+    LIKE on the integer would lose the leading zeros.
+    """
+    description = 'Zero-padded digit string stored as an integer'
+
+    def __init__(self, *args, digits, **kwargs):
+        if not 0 < digits <= 18:
+            raise ValueError('digits must be between 1 and 18 to fit a bigint')
+        self.digits = digits
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['digits'] = self.digits
+        return name, path, args, kwargs
+
+    @property
+    def validators(self):
+        # Skip IntegerField's range validators, which compare against the
+        # Python value; here that is a string
+        return [*self.default_validators, *self._validators]
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return f'{value:0{self.digits}d}'
+
+    def to_python(self, value):
+        if value is None or value == '':
+            return None
+        if isinstance(value, int):
+            return f'{value:0{self.digits}d}'
+        value = str(value).strip()
+        if value.isdigit() and len(value) <= self.digits:
+            return value.zfill(self.digits)
+        return value
+
+    def get_prep_value(self, value):
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                return None
+        return super().get_prep_value(value)
+
+    def formfield(self, **kwargs):
+        # A text input keeps the leading zeros; the admin would otherwise pass
+        # its number widget for integer fields
+        widget = kwargs.get('widget')
+        if isinstance(widget, type) and issubclass(widget, forms.NumberInput):
+            del kwargs['widget']
+        # Skip IntegerField.formfield, which builds a numeric form field
+        return models.Field.formfield(self, **{
+            'form_class': forms.CharField,
+            'max_length': self.digits,
+            'validators': [RegexValidator(rf'^\d{{1,{self.digits}}}$', f'Enter up to {self.digits} digits')],
+            **kwargs,
+        })
+
+    def prefix_range(self, prefix):
+        """Inclusive (low, high) bounds of values whose padded form starts with ``prefix``."""
+        if not prefix.isdigit() or len(prefix) > self.digits:
+            return None
+        padding = self.digits - len(prefix)
+        return int(prefix + '0' * padding), int(prefix + '9' * padding)
+
+
+class TransactionVersion(models.Func):
+    """
+    pg_current_xact_id() as a bigint: the id of the writing transaction, which
+    only grows. Used as the change version of tracked rows (see people.changes).
+    """
+    template = 'pg_current_xact_id()::text::bigint'
+    output_field = models.BigIntegerField()
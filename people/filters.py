@@ -0,0 +1,67 @@
+import django_filters
+from django.core.validators import RegexValidator
+from django.db.models import BigIntegerField
+from django.db.models.functions import Mod
+from .models import Person, CreditCard, PhoneNumber, PersonIdentity, Source
+from .normalization import normalize_search_text
+
+
+class PersonFilter(django_filters.FilterSet):
+	# Text filters, so leading zeros are accepted and bad input is a 400
+	national_code = django_filters.CharFilter(validators=[RegexValidator(r'^\d{1,10}$')])
+	# ?birthdate_after=YYYY-MM-DD&birthdate_before=YYYY-MM-DD
+	birthdate = django_filters.DateFromToRangeFilter()
+	# UPPER(first_name) LIKE UPPER('%...%'), served by idx_person_first_name_trgm
+	first_name = django_filters.CharFilter(lookup_expr='icontains')
+	# Persian-aware name search over the folded search_name column
+	search = django_filters.CharFilter(method='filter_search')
+
+	class Meta:
+		model = Person
+		fields = ['source', 'national_code', 'birthdate', 'first_name']
+
+	def filter_search(self, queryset, name, value):
+		term = normalize_search_text(value)
+		if not term:
+			return queryset
+		# search_name LIKE '%term%', served by idx_person_search_name_trgm
+		return queryset.filter(search_name__contains=term)
+
+
+class CreditCardFilter(django_filters.FilterSet):
+	card_number = django_filters.CharFilter(validators=[RegexValidator(r'^\d{1,16}$')])
+	# card_number BETWEEN 6037000000000000 AND 6037999999999999, served by uniq_creditcard_number_source
+	card_prefix = django_filters.CharFilter(method='filter_card_prefix', validators=[RegexValidator(r'^\d{1,16}$')])
+	card_last4 = django_filters.CharFilter(method='filter_card_last4', validators=[RegexValidator(r'^\d{4}$')])
+
+	class Meta:
+		model = CreditCard
+		fields = ['source', 'card_number', 'person']
+
+	def filter_card_prefix(self, queryset, name, value):
+		return queryset.filter(card_number__range=CreditCard._meta.get_field('card_number').prefix_range(value))
+
+	def filter_card_last4(self, queryset, name, value):
+		# Must match the idx_creditcard_last4 expression exactly to use it
+		return queryset.alias(card_last4=Mod('card_number', 10000, output_field=BigIntegerField())).filter(card_last4=int(value))
+
+
+class PhoneNumberFilter(django_filters.FilterSet):
+
+	class Meta:
+		model = PhoneNumber
+		fields = ['source', 'number', 'person']
+
+
+class PersonIdentityFilter(django_filters.FilterSet):
+	# sources @> ARRAY['MELLI'], served by idx_identity_sources
+	source = django_filters.ChoiceFilter(choices=Source.choices, method='filter_source')
+	# ?min_sources=2: people known to more than one bank
+	min_sources = django_filters.NumberFilter(field_name='source_count', lookup_expr='gte')
+
+	class Meta:
+		model = PersonIdentity
+		fields = ['source', 'min_sources']
+
+	def filter_source(self, queryset, name, value):
+		return queryset.filter(sources__contains=[value])
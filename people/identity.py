@@ -0,0 +1,120 @@
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from .models import CreditCard, Person, PersonIdentity, PhoneNumber
+
+# PersonIdentity rows are recomputed from the per-bank tables for a set of
+# national codes with one INSERT ... SELECT ... ON CONFLICT, so refreshing a
+# chunk costs one grouped index lookup per code rather than a scan.
+
+BATCH_SIZE = 5000
+
+
+def _refresh_sql():
+    qn = connection.ops.quote_name
+    identity = qn(PersonIdentity._meta.db_table)
+    person = qn(Person._meta.db_table)
+    card = qn(CreditCard._meta.db_table)
+    phone = qn(PhoneNumber._meta.db_table)
+    return (
+        f'INSERT INTO {identity} (national_code, first_name, last_name, birthdate, sources, '
+        'source_count, card_count, phone_count, updated_at) '
+        'SELECT p.national_code, '
+        # Highest id = most recently imported
+        "coalesce((array_agg(p.first_name ORDER BY p.id DESC) FILTER (WHERE p.first_name <> ''))[1], ''), "
+        "(array_agg(p.last_name ORDER BY p.id DESC) FILTER (WHERE p.last_name <> ''))[1], "
+        '(array_agg(p.birthdate ORDER BY p.id DESC) FILTER (WHERE p.birthdate IS NOT NULL))[1], '
+        'array_agg(DISTINCT p.source ORDER BY p.source), '
+        'count(DISTINCT p.source), '
+        # Distinct across banks: the same card or phone reported twice counts once
+        f'(SELECT count(DISTINCT c.card_number) FROM {card} c WHERE c.person_id = ANY(array_agg(p.id))), '
+        f'(SELECT count(DISTINCT ph.number) FROM {phone} ph WHERE ph.person_id = ANY(array_agg(p.id))), '
+        'now() '
+        f'FROM {person} p WHERE p.national_code = ANY(%s) GROUP BY p.national_code '
+        'ON CONFLICT (national_code) DO UPDATE SET '
+        'first_name = EXCLUDED.first_name, last_name = EXCLUDED.last_name, birthdate = EXCLUDED.birthdate, '
+        'sources = EXCLUDED.sources, source_count = EXCLUDED.source_count, card_count = EXCLUDED.card_count, '
+        'phone_count = EXCLUDED.phone_count, updated_at = EXCLUDED.updated_at'
+    )
+
+
+def refresh_identities(national_codes):
+    """Recompute the identity rows for ``national_codes``; codes no bank has any more are removed."""
+    codes = sorted({int(code) for code in national_codes})
+    if not codes:
+        return
+    qn = connection.ops.quote_name
+    identity = qn(PersonIdentity._meta.db_table)
+    person = qn(Person._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Concurrent workers refreshing the same code would otherwise race:
+        # an aggregate read before another worker's rows committed could be
+        # written last. Lock the identity rows in code order first (creating
+        # missing ones, removed again below if no bank has the code), so the
+        # aggregate, read by the next statement, sees every earlier commit
+        cursor.execute(
+            f'INSERT INTO {identity} (national_code, first_name, sources, source_count, card_count, '
+            'phone_count, updated_at) '
+            "SELECT code, '', '{}', 0, 0, 0, now() FROM unnest(%s::bigint[]) AS code ORDER BY code "
+            'ON CONFLICT (national_code) DO NOTHING',
+            [codes],
+        )
+        cursor.execute(
+            f'SELECT 1 FROM {identity} WHERE national_code = ANY(%s) ORDER BY national_code FOR UPDATE',
+            [codes],
+        )
+        cursor.execute(_refresh_sql(), [codes])
+        cursor.execute(
+            f'DELETE FROM {identity} i WHERE i.national_code = ANY(%s) '
+            f'AND NOT EXISTS (SELECT 1 FROM {person} p WHERE p.national_code = i.national_code)',
+            [codes],
+        )
+
+
+def refresh_source(source, batch_size=BATCH_SIZE):
+    """Refresh every identity ``source`` contributes to, e.g. after its partition was replaced.
+
+    Walks the source's national codes in keyset batches, then the identities
+    that still list the source but no longer have a row in it.
+    """
+    stale = PersonIdentity.objects.filter(sources__contains=[source]).exclude(
+        Exists(Person.objects.filter(source=source, national_code=OuterRef('national_code')))
+    )
+    for queryset in (Person.objects.filter(source=source), stale):
+        last = -1
+        while True:
+            batch = list(
+                queryset.filter(national_code__gt=last)
+                .order_by('national_code')
+                .values_list('national_code', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            refresh_identities(batch)
+            last = batch[-1]
+
+
+def rebuild_identities(batch_size=BATCH_SIZE):
+    """Recompute the whole table in batches of national codes; returns the number of codes seen."""
+    seen = 0
+    last = -1
+    while True:
+        # Walks uniq_person_national_code_source in national_code order
+        batch = list(
+            Person.objects.filter(national_code__gt=last)
+            .order_by('national_code')
+            .values_list('national_code', flat=True)
+            .distinct()[:batch_size]
+        )
+        if not batch:
+            break
+        refresh_identities(batch)
+        seen += len(batch)
+        last = batch[-1]
+
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {qn(PersonIdentity._meta.db_table)} i WHERE NOT EXISTS '
+            f'(SELECT 1 FROM {qn(Person._meta.db_table)} p WHERE p.national_code = i.national_code)'
+        )
+    return seen
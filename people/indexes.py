@@ -0,0 +1,110 @@
+from contextlib import contextmanager
+from django.db import connection
+from .models import CreditCard, Person
+
+# Bulk loads (ImportJob.defer_indexes) drop the indexes below while a MERGE
+# import writes its chunks and rebuild them afterwards without blocking
+# writes. Only non-unique indexes that serve reads are listed: the unique
+# constraints back the importer's upserts, the person_id foreign-key
+# indexes back its phone-number lookups, and the version indexes stay because
+# replicas keep polling ?since= during a load.
+#
+# The tables are partitioned, and a partition's index cannot be dropped on
+# its own, so a drop removes the index from every source. A rebuild creates
+# the parent index ON ONLY the parent table (invalid, nothing built yet),
+# builds each partition's index CONCURRENTLY and attaches it; the parent index
+# turns valid once every partition has one.
+
+DEFERRABLE_INDEXES = {
+    Person: ('idx_person_birthdate', 'idx_person_first_name_trgm', 'idx_person_search_name_trgm'),
+    CreditCard: ('idx_creditcard_last4',),
+}
+
+# pg_advisory_lock key serializing drops and rebuilds across import workers
+_LOCK_KEY = 4512001
+
+
+def deferrable_indexes():
+    """(model, Index) pairs for DEFERRABLE_INDEXES, from the current model definitions."""
+    for model, names in DEFERRABLE_INDEXES.items():
+        for index in model._meta.indexes:
+            if index.name in names:
+                yield model, index
+
+
+def drop_deferrable_indexes():
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor, _locked(cursor):
+        for _, index in deferrable_indexes():
+            cursor.execute(f'DROP INDEX IF EXISTS {qn(index.name)}')
+
+
+def rebuild_deferrable_indexes():
+    """Recreate whichever deferrable indexes are missing or invalid; returns their names.
+
+    Safe to run again after an interruption: partitions that already have a
+    valid index are only attached.
+    """
+    rebuilt = []
+    with connection.cursor() as cursor, _locked(cursor):
+        for model, index in deferrable_indexes():
+            if _is_valid(cursor, index.name):
+                continue
+            _rebuild(cursor, model, index)
+            rebuilt.append(index.name)
+    return rebuilt
+
+
+def _rebuild(cursor, model, index):
+    qn = connection.ops.quote_name
+    table = model._meta.db_table
+    if not _exists(cursor, index.name):
+        statement = _create_sql(model, index)
+        statement.template = statement.template.replace(' ON %(table)s', ' ON ONLY %(table)s', 1)
+        cursor.execute(str(statement))
+
+    cursor.execute(
+        'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+        'WHERE i.inhparent = %s::regclass ORDER BY c.relname',
+        [table],
+    )
+    for (partition,) in cursor.fetchall():
+        name = f'{partition}_{index.name}'
+        if _exists(cursor, name) and not _is_valid(cursor, name):
+            # Left behind by an interrupted concurrent build
+            cursor.execute(f'DROP INDEX CONCURRENTLY {qn(name)}')
+        if not _exists(cursor, name):
+            statement = _create_sql(model, index, concurrently=True)
+            statement.rename_table_references(table, partition)
+            statement.parts['name'] = qn(name)
+            cursor.execute(str(statement))
+        # A no-op when it is already attached
+        cursor.execute(f'ALTER INDEX {qn(index.name)} ATTACH PARTITION {qn(name)}')
+
+
+def _create_sql(model, index, **kwargs):
+    with connection.schema_editor(atomic=False) as schema_editor:
+        return index.create_sql(model, schema_editor, **kwargs)
+
+
+def _exists(cursor, name):
+    cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [connection.ops.quote_name(name)])
+    return cursor.fetchone()[0]
+
+
+def _is_valid(cursor, name):
+    cursor.execute(
+        'SELECT i.indisvalid FROM pg_index i WHERE i.indexrelid = to_regclass(%s)',
+        [connection.ops.quote_name(name)],
+    )
+    row = cursor.fetchone()
+    return bool(row and row[0])
+
+
+@contextmanager
+def _locked(cursor):
+    cursor.execute('SELECT pg_advisory_lock(%s)', [_LOCK_KEY])
+    try:
+        yield
+    finally:
+        cursor.execute('SELECT pg_advisory_unlock(%s)', [_LOCK_KEY])
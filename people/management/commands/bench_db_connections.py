@@ -0,0 +1,45 @@
+import json
+import time
+from django.core import signals
+from django.core.management.base import BaseCommand
+from django.db import connection
+from people.benchmarking import summarize_latencies
+
+
+class Command(BaseCommand):
+    help = 'Measures per-request database overhead under the current connection settings (CONN_MAX_AGE / pool)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Simulated request cycles')
+        parser.add_argument('--queries', type=int, default=1, help='Queries per simulated request')
+        parser.add_argument(
+            '--conn-max-age',
+            type=int,
+            default=None,
+            help='Override CONN_MAX_AGE for this run (0 reproduces connect-per-request)',
+        )
+
+    def handle(self, *args, **options):
+        if options['conn_max_age'] is not None:
+            connection.close()
+            connection.settings_dict['CONN_MAX_AGE'] = options['conn_max_age']
+
+        timings = []
+        for _ in range(options['requests']):
+            started = time.perf_counter()
+            # Same signals Django fires around a real request; request_finished
+            # closes (or returns to the pool) connections that must not be kept
+            signals.request_started.send(sender=self.__class__)
+            with connection.cursor() as cursor:
+                for _ in range(options['queries']):
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+            signals.request_finished.send(sender=self.__class__)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        report = {
+            'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+            'pool': connection.settings_dict['OPTIONS'].get('pool', False),
+            **summarize_latencies(timings),
+        }
+        self.stdout.write(json.dumps(report, indent=2, default=str))
@@ -0,0 +1,179 @@
+import json
+import os
+import resource
+import tempfile
+import time
+from collections import defaultdict
+from django.core.management.base import BaseCommand, CommandError
+import pandas as pd
+from people.encoding import detect_encoding, fix_mojibake_column
+from people.models import ImportReader, Person, Source
+from people.readers import read_csv_chunks
+from people.synthetic import generate_rows, write_dump
+from people.tasks import normalize_row, write_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates a synthetic Melli-style dump and times each import stage '
+        '(read, publish, consume, normalize, write) against the configured database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000)
+        parser.add_argument('--format', choices=['csv', 'xlsx'], default='csv')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per chunk, as in import_chunks')
+        parser.add_argument('--duplicate-rate', type=float, default=0.05)
+        parser.add_argument('--scientific-rate', type=float, default=0.1, help='Share of cards like 6.03799E+15')
+        parser.add_argument('--mojibake-rate', type=float, default=0.2)
+        parser.add_argument('--multi-phone-rate', type=float, default=0.3)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--file', help='Benchmark this existing file instead of generating one')
+        parser.add_argument('--source', default=Source.UNKNOWN, choices=Source.values)
+        parser.add_argument('--reader', default=ImportReader.PANDAS, choices=ImportReader.values, help='CSV reader backend')
+        parser.add_argument('--skip-write', action='store_true', help='Stop after normalize (no DB writes)')
+        parser.add_argument('--melli', action='store_true', help='Also time import_melli_file end to end')
+        parser.add_argument(
+            '--cleanup',
+            action='store_true',
+            help='Delete the people this run inserted afterwards (people it updated stay as written)',
+        )
+        parser.add_argument('--output', help='Write the JSON report to this path as well')
+
+    def handle(self, *args, **options):
+        if options['cleanup'] and options['source'] != Source.UNKNOWN:
+            raise CommandError('--cleanup only runs against the UNKNOWN source')
+
+        # Person ids come from one sequence, so the rows this run inserts are
+        # the source's rows above the current maximum
+        first_id = Person.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+        path = options['file']
+        generated = path is None
+        if generated:
+            fd, path = tempfile.mkstemp(suffix=f".{options['format']}")
+            os.close(fd)
+            started = time.perf_counter()
+            write_dump(path, generate_rows(
+                options['rows'],
+                duplicate_rate=options['duplicate_rate'],
+                scientific_rate=options['scientific_rate'],
+                mojibake_rate=options['mojibake_rate'],
+                multi_phone_rate=options['multi_phone_rate'],
+                seed=options['seed'],
+            ))
+            generate_seconds = time.perf_counter() - started
+        else:
+            generate_seconds = None
+
+        try:
+            report = {
+                'file': path,
+                'file_bytes': os.path.getsize(path),
+                'generate_seconds': _round(generate_seconds),
+                'chunked': self._bench_chunked(path, options),
+            }
+            if options['melli']:
+                report['import_melli_file'] = self._bench_melli(path, options['source'], options['reader'])
+            report['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        finally:
+            if generated:
+                os.remove(path)
+            if options['cleanup']:
+                Person.objects.filter(source=options['source'], id__gt=first_id).delete()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
+
+    def _bench_chunked(self, path, options):
+        """The import_chunks -> RabbitMQ -> process_chunk path, minus the broker."""
+        source = options['source']
+        stages = defaultdict(float)
+        rows = 0
+        written = 0
+        chunks = 0
+        started = time.perf_counter()
+
+        t = time.perf_counter()
+        reader, repair_mojibake = _read_chunks(path, options['chunk_size'], options['reader'])
+        stages['read'] += time.perf_counter() - t
+        while True:
+            # Includes the FULL_NAME repair, which the readers do per chunk
+            t = time.perf_counter()
+            records = next(reader, None)
+            stages['read'] += time.perf_counter() - t
+            if records is None:
+                break
+
+            # publish/consume: the JSON round trip every chunk makes through the broker
+            t = time.perf_counter()
+            body = json.dumps({'job_id': 0, 'source': source, 'chunk_index': chunks, 'rows': records})
+            stages['publish'] += time.perf_counter() - t
+            t = time.perf_counter()
+            records = json.loads(body)['rows']
+            stages['consume'] += time.perf_counter() - t
+
+            t = time.perf_counter()
+            normalized = [
+                record for record in (normalize_row(row, repair_mojibake=False) for row in records)
+                if record is not None
+            ]
+            stages['normalize'] += time.perf_counter() - t
+
+            if not options['skip_write']:
+                t = time.perf_counter()
+                write_rows(normalized, source)
+                stages['write'] += time.perf_counter() - t
+
+            rows += len(records)
+            written += len(normalized)
+            chunks += 1
+
+        total = time.perf_counter() - started
+        return {
+            'rows': rows,
+            'rows_valid': written,
+            'reader': options['reader'],
+            'repair_mojibake': repair_mojibake,
+            'chunks': chunks,
+            'total_seconds': _round(total),
+            'rows_per_sec': round(rows / total) if total else None,
+            'stages': {
+                name: {'seconds': _round(seconds), 'rows_per_sec': round(rows / seconds) if seconds else None}
+                for name, seconds in stages.items()
+            },
+        }
+
+    def _bench_melli(self, path, source, reader):
+        # Imported lazily: admin registers models and pulls in the admin site
+        from people.admin import import_melli_file
+        started = time.perf_counter()
+        inserted, updated = import_melli_file(path, source, reader)
+        total = time.perf_counter() - started
+        rows = inserted + updated
+        return {
+            'inserted': inserted,
+            'updated': updated,
+            'total_seconds': _round(total),
+            'rows_per_sec': round(rows / total) if total else None,
+        }
+
+
+def _read_chunks(path, chunk_size, reader):
+    """(iterator of row-dict lists, repair_mojibake) with the same reader settings as import_chunks."""
+    if path.lower().endswith(('.xlsx', '.xlsm')):
+        df = pd.read_excel(path, dtype=str, keep_default_na=False, engine='openpyxl')
+        if 'FULL_NAME' in df:
+            df['FULL_NAME'] = fix_mojibake_column(df['FULL_NAME'])
+        # No file-level signal for Excel; the column pre-check decides per cell
+        chunks = (df[i:i + chunk_size].to_dict(orient='records') for i in range(0, len(df), chunk_size))
+        return chunks, True
+    file_encoding = detect_encoding(path)
+    return read_csv_chunks(path, chunk_size, file_encoding, reader=reader), file_encoding.repair_mojibake
+
+
+def _round(value):
+    return None if value is None else round(value, 4)
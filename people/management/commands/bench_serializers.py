@@ -0,0 +1,65 @@
+import json
+import time
+from django.core.management.base import BaseCommand
+from rest_framework.response import Response
+from rest_framework.utils.serializer_helpers import ReturnList
+from naft_khabar.response import CustomJSONRenderer
+from people.models import Person, CreditCard, PhoneNumber
+from people.serializers import PersonSerializer, CreditCardSerializer, PhoneNumberSerializer
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the ModelSerializer list path against the values() fast path on large pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Rows per page')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per path; the best run is reported')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        repeat = options['repeat']
+        renderer = CustomJSONRenderer()
+        context = {'response': Response(status=200)}
+
+        report = {}
+        for model, serializer_class in (
+            (Person, PersonSerializer),
+            (CreditCard, CreditCardSerializer),
+            (PhoneNumber, PhoneNumberSerializer),
+        ):
+            queryset = model.objects.order_by('id')
+            fields = serializer_class.Meta.fields
+
+            def serializer_path():
+                data = serializer_class(list(queryset[:rows]), many=True).data
+                return renderer.render(data, 'application/json', context)
+
+            def fast_path():
+                data = ReturnList(queryset.values(*fields)[:rows], serializer=None)
+                return renderer.render(data, 'application/json', context)
+
+            slow_body, slow_time = self._best_of(serializer_path, repeat)
+            fast_body, fast_time = self._best_of(fast_path, repeat)
+            page = len(json.loads(fast_body))
+            report[model.__name__] = {
+                'rows': page,
+                'same_output': slow_body == fast_body,
+                'serializer_seconds': round(slow_time, 4),
+                'fast_path_seconds': round(fast_time, 4),
+                'serializer_rows_per_sec': round(page / slow_time) if slow_time else None,
+                'fast_path_rows_per_sec': round(page / fast_time) if fast_time else None,
+                'speedup': round(slow_time / fast_time, 2) if fast_time else None,
+            }
+
+        self.stdout.write(json.dumps(report, indent=2))
+
+    @staticmethod
+    def _best_of(func, repeat):
+        best = None
+        body = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            body = func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return body, best
@@ -0,0 +1,93 @@
+import json
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework import throttling
+from rest_framework.request import Request
+from naft_khabar.throttling import SlidingWindowThrottleMixin
+from people.benchmarking import summarize_latencies
+
+
+class Command(BaseCommand):
+    help = (
+        "Times one throttle check per request for DRF's timestamp-history throttle and the "
+        'sliding-window counter, for clients with growing request histories'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rate', default='30000/minute', help='Rate both throttles enforce')
+        parser.add_argument('--requests', type=int, default=2000, help='Timed checks per history size')
+        parser.add_argument(
+            '--history',
+            type=int,
+            action='append',
+            help='Requests the client already made in the window; repeat for several (default: 0 1000 10000 25000)',
+        )
+        parser.add_argument('--cache', help='Cache alias to use (default: THROTTLE_CACHE)')
+        parser.add_argument('--output', help='Write the JSON report to this path as well')
+
+    def handle(self, *args, **options):
+        alias = options['cache'] or getattr(settings, 'THROTTLE_CACHE', 'default')
+        cache = caches[alias]
+        histories = options['history'] or [0, 1000, 10000, 25000]
+
+        class HistoryThrottle(throttling.AnonRateThrottle):
+            scope = 'bench_history'
+            rate = options['rate']
+
+        HistoryThrottle.cache = cache
+
+        class CounterThrottle(SlidingWindowThrottleMixin, throttling.AnonRateThrottle):
+            scope = 'bench_counter'
+            rate = options['rate']
+
+            def get_cache(self):
+                return cache
+
+        report = {'rate': options['rate'], 'cache': alias, 'backend': type(cache).__name__, 'histories': []}
+        for i, history in enumerate(histories):
+            # A fresh client address per run, so earlier runs leave no state behind
+            request = Request(RequestFactory().get('/', REMOTE_ADDR=f'10.255.{i // 256}.{i % 256}'))
+            result = {'history': history}
+            for name, throttle_class in (('drf_history', HistoryThrottle), ('sliding_window', CounterThrottle)):
+                throttle = throttle_class()
+                self._prefill(throttle, request, cache, history)
+                timings = []
+                allowed = 0
+                for _ in range(options['requests']):
+                    started = time.perf_counter()
+                    allowed += throttle_class().allow_request(request, None)
+                    timings.append((time.perf_counter() - started) * 1000)
+                result[name] = {**summarize_latencies(timings), 'allowed': allowed}
+                cache.delete_many([key for key in self._keys(throttle, request)])
+            result['speedup_p50'] = (
+                round(result['drf_history']['p50_ms'] / result['sliding_window']['p50_ms'], 1)
+                if result['sliding_window']['p50_ms'] else None
+            )
+            report['histories'].append(result)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
+
+    def _prefill(self, throttle, request, cache, history):
+        key = throttle.get_cache_key(request, None)
+        now = throttle.timer()
+        if isinstance(throttle, SlidingWindowThrottleMixin):
+            window = int(now // throttle.duration)
+            cache.set(f'{key}:{window}', history, 2 * throttle.duration)
+        else:
+            # Newest first, spread over the last half window, as SimpleRateThrottle keeps it
+            step = throttle.duration / 2 / max(history, 1)
+            cache.set(key, [now - n * step for n in range(history)], throttle.duration)
+
+    def _keys(self, throttle, request):
+        key = throttle.get_cache_key(request, None)
+        if isinstance(throttle, SlidingWindowThrottleMixin):
+            window = int(throttle.timer() // throttle.duration)
+            return [f'{key}:{window - 1}', f'{key}:{window}', f'{key}:{window + 1}']
+        return [key]
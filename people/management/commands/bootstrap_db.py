@@ -0,0 +1,58 @@
+import os
+import psycopg2
+from psycopg2 import sql
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Creates the application database and schema if they do not exist (safe to run repeatedly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--maintenance-db',
+            default=os.environ.get('POSTGRES_MAINTENANCE_DB', 'postgres'),
+            help='Database to connect to while creating the application database',
+        )
+        parser.add_argument('--timeout', type=int, default=10, help='Connect timeout in seconds')
+
+    def handle(self, *args, **options):
+        db = settings.DATABASES['default']
+        name = db['NAME']
+        schema = settings.DATABASE_SCHEMA
+        if not name:
+            raise CommandError('POSTGRES_NAME is not set')
+
+        params = {
+            'user': db['USER'],
+            'password': db['PASSWORD'],
+            'host': db['HOST'],
+            'port': db['PORT'],
+            'connect_timeout': options['timeout'],
+        }
+
+        try:
+            # CREATE DATABASE cannot run inside a transaction block
+            conn = psycopg2.connect(dbname=options['maintenance_db'], **params)
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute('SELECT 1 FROM pg_database WHERE datname = %s', [name])
+                    if cursor.fetchone():
+                        self.stdout.write(f'Database {name} already exists')
+                    else:
+                        cursor.execute(sql.SQL('CREATE DATABASE {}').format(sql.Identifier(name)))
+                        self.stdout.write(f'Created database {name}')
+            finally:
+                conn.close()
+
+            conn = psycopg2.connect(dbname=name, **params)
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(sql.SQL('CREATE SCHEMA IF NOT EXISTS {}').format(sql.Identifier(schema)))
+                self.stdout.write(f'Schema {schema} is ready')
+            finally:
+                conn.close()
+        except psycopg2.Error as e:
+            raise CommandError(f'Database bootstrap failed: {e}')
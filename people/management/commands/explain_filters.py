@@ -0,0 +1,51 @@
+import json
+import re
+from django.core.management.base import BaseCommand
+from people.filters import PersonFilter, CreditCardFilter, PhoneNumberFilter
+from people.models import Person, CreditCard, PhoneNumber
+
+INDEX_SCAN_RE = re.compile(r'(?:Index Scan|Index Only Scan|Bitmap Index Scan)(?: Backward)?(?: using| on) (\S+)')
+
+
+class Command(BaseCommand):
+    help = 'Runs EXPLAIN for every people API filter and reports which index serves it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--analyze', action='store_true', help='Use EXPLAIN ANALYZE (executes the queries)')
+
+    def handle(self, *args, **options):
+        person = Person.objects.order_by('id').first()
+        card = CreditCard.objects.order_by('id').first()
+        phone = PhoneNumber.objects.order_by('id').first()
+        if not (person and card and phone):
+            self.stderr.write('Need at least one person, card and phone number to build sample filters')
+            return
+
+        samples = [
+            (PersonFilter, Person, {'source': person.source}),
+            (PersonFilter, Person, {'national_code': person.national_code}),
+            (PersonFilter, Person, {'birthdate_after': '1990-01-01', 'birthdate_before': '1990-12-31'}),
+            (PersonFilter, Person, {'first_name': (person.first_name or 'abc')[:4]}),
+            (CreditCardFilter, CreditCard, {'source': card.source}),
+            (CreditCardFilter, CreditCard, {'card_number': card.card_number}),
+            (CreditCardFilter, CreditCard, {'card_prefix': card.card_number[:6]}),
+            (CreditCardFilter, CreditCard, {'card_last4': card.card_number[-4:]}),
+            (PhoneNumberFilter, PhoneNumber, {'source': phone.source}),
+            (PhoneNumberFilter, PhoneNumber, {'number': phone.number}),
+        ]
+
+        report = []
+        for filterset_class, model, params in samples:
+            filterset = filterset_class(params, queryset=model.objects.order_by('id'))
+            queryset = filterset.qs[:options['page_size']]
+            plan = queryset.explain(analyze=options['analyze'])
+            report.append({
+                'model': model.__name__,
+                'params': params,
+                'indexes': INDEX_SCAN_RE.findall(plan),
+                'seq_scan': 'Seq Scan' in plan,
+                'plan': plan.splitlines(),
+            })
+
+        self.stdout.write(json.dumps(report, indent=2, ensure_ascii=False))
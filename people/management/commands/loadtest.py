@@ -0,0 +1,240 @@
+import http.client
+import itertools
+import json
+import random
+import string
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import quote, urlsplit
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from people.benchmarking import summarize_latencies
+from people.models import CreditCard, Person, PhoneNumber
+
+DEFAULT_SPEC = settings.BASE_DIR / 'loadtests' / 'people_api.jsonl'
+
+# Placeholder -> (pool, value) for spec paths; values come from sampled rows
+PLACEHOLDERS = {
+    'person_id': ('people', lambda row: row['id']),
+    'national_code': ('people', lambda row: row['national_code']),
+    'last_name_part': ('people', lambda row: row['first_name'].split()[-1] if row['first_name'] else ''),
+    'card_number': ('cards', lambda row: row['card_number']),
+    'card_prefix': ('cards', lambda row: row['card_number'][:8]),
+    'card_last4': ('cards', lambda row: row['card_number'][-4:]),
+    'mobile': ('phones', lambda row: row['number']),
+}
+
+
+class Command(BaseCommand):
+    help = 'Sends concurrent HTTP requests to a running server and reports latency percentiles per endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8001')
+        parser.add_argument(
+            '--path',
+            action='append',
+            dest='paths',
+            help='Request path; repeat to mix several (overrides --spec)',
+        )
+        parser.add_argument(
+            '--spec',
+            help=f'JSONL request mix, one {{"name", "path", "method", "weight"}} per line (default: {DEFAULT_SPEC.name})',
+        )
+        parser.add_argument('--concurrency', type=int, default=16, help='Parallel keep-alive clients')
+        parser.add_argument('--requests', type=int, default=2000, help='Total requests across all clients')
+        parser.add_argument('--timeout', type=float, default=30.0)
+        parser.add_argument('--seed', type=int, default=0, help='Seed for the request mix, so runs can be replayed')
+        parser.add_argument('--sample-size', type=int, default=1000, help='Rows sampled per table to fill placeholders')
+        parser.add_argument('--max-page', type=int, default=10, help='Upper bound for {page}')
+        parser.add_argument('--output', help='Write the JSON report to this path as well')
+
+    def handle(self, *args, **options):
+        if options['paths']:
+            specs = [{'name': path, 'method': 'GET', 'path': path, 'weight': 1} for path in options['paths']]
+        else:
+            specs = load_spec(options['spec'] or DEFAULT_SPEC)
+
+        requests = build_requests(specs, options['requests'], options, random.Random(options['seed']))
+        report = run_load(
+            options['base_url'],
+            requests.__getitem__,
+            total=len(requests),
+            concurrency=options['concurrency'],
+            timeout=options['timeout'],
+        )
+        report['spec'] = str(options['spec'] or ('--path' if options['paths'] else DEFAULT_SPEC))
+        report['seed'] = options['seed']
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
+
+
+def load_spec(path):
+    """Read a JSONL request mix; blank lines and lines starting with # are skipped."""
+    specs = []
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError as e:
+                    raise CommandError(f'{path}:{line_no}: {e}')
+                if 'path' not in entry:
+                    raise CommandError(f'{path}:{line_no}: missing "path"')
+                specs.append({
+                    'name': entry.get('name', entry['path']),
+                    'method': entry.get('method', 'GET').upper(),
+                    'path': entry['path'],
+                    'weight': float(entry.get('weight', 1)),
+                })
+    except OSError as e:
+        raise CommandError(f'Cannot read spec: {e}')
+    if not specs:
+        raise CommandError(f'{path} has no requests')
+    return specs
+
+
+def build_requests(specs, total, options, rng):
+    """Expand the weighted spec into ``total`` concrete requests, up front.
+
+    Placeholders such as ``{national_code}`` are filled from rows sampled out
+    of the database; ``{page}`` is 1..--max-page and ``{deep_page}`` falls in
+    the last tenth of the person list, to exercise large OFFSETs.
+    """
+    fields = {
+        name
+        for spec in specs
+        for _, name, _, _ in string.Formatter().parse(spec['path'])
+        if name
+    }
+    unknown = fields - set(PLACEHOLDERS) - {'page', 'deep_page'}
+    if unknown:
+        raise CommandError(f'Unknown placeholders in spec: {", ".join(sorted(unknown))}')
+
+    pools = {}
+    for pool in {PLACEHOLDERS[name][0] for name in fields if name in PLACEHOLDERS}:
+        pools[pool] = _sample(pool, options['sample_size'], rng)
+        if not pools[pool]:
+            raise CommandError(f'No {pool} rows to sample; run seed_people first')
+
+    last_page = 1
+    if 'deep_page' in fields:
+        page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 1
+        last_page = max(1, -(-Person.objects.count() // page_size))
+
+    requests = []
+    for spec in rng.choices(specs, weights=[spec['weight'] for spec in specs], k=total):
+        rows = {pool: rng.choice(values) for pool, values in pools.items()}
+        values = {}
+        for name in fields:
+            if name == 'page':
+                values[name] = rng.randint(1, options['max_page'])
+            elif name == 'deep_page':
+                values[name] = rng.randint(max(1, last_page - last_page // 10), last_page)
+            else:
+                pool, getter = PLACEHOLDERS[name]
+                values[name] = quote(str(getter(rows[pool])), safe='')
+        requests.append({'name': spec['name'], 'method': spec['method'], 'path': spec['path'].format(**values)})
+    return requests
+
+
+def _sample(pool, size, rng):
+    model, fields = {
+        'people': (Person, ['id', 'national_code', 'first_name']),
+        'cards': (CreditCard, ['id', 'card_number']),
+        'phones': (PhoneNumber, ['id', 'number']),
+    }[pool]
+    bounds = model.objects.aggregate(low=Min('id'), high=Max('id'))
+    if bounds['low'] is None:
+        return []
+    # Random ids instead of ORDER BY random(), which scans the whole table
+    ids = {rng.randint(bounds['low'], bounds['high']) for _ in range(size)}
+    rows = list(model.objects.filter(id__in=ids).values(*fields))
+    return rows or list(model.objects.values(*fields)[:size])
+
+
+def run_load(base_url, pick_request, total, concurrency, timeout=30.0):
+    """Issue ``total`` requests from ``concurrency`` threads.
+
+    ``pick_request(i)`` returns ``{'name', 'method', 'path'}`` for the i-th
+    request; results are grouped by ``name``.
+    """
+    base = urlsplit(base_url)
+    prefix = base.path.rstrip('/')
+    counter = itertools.count()
+    lock = threading.Lock()
+    samples = []
+
+    def client():
+        conn = _connect(base, timeout)
+        local = []
+        while True:
+            i = next(counter)
+            if i >= total:
+                break
+            request = pick_request(i)
+            started = time.perf_counter()
+            try:
+                conn.request(request['method'], prefix + request['path'], headers={'Accept': 'application/json'})
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                status = None
+                conn.close()
+                conn = _connect(base, timeout)
+            local.append((request['name'], (time.perf_counter() - started) * 1000, status))
+        conn.close()
+        with lock:
+            samples.extend(local)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    by_name = defaultdict(list)
+    for name, ms, status in samples:
+        by_name[name].append((ms, status))
+
+    endpoints = {}
+    for name, results in by_name.items():
+        errors = sum(1 for _, status in results if status is None or status >= 400)
+        statuses = defaultdict(int)
+        for _, status in results:
+            statuses[str(status)] += 1
+        endpoints[name] = {
+            **summarize_latencies([ms for ms, _ in results]),
+            'throughput_rps': round(len(results) / elapsed, 1) if elapsed else None,
+            'error_rate': round(errors / len(results), 4),
+            'statuses': dict(statuses),
+        }
+
+    errors = sum(1 for _, _, status in samples if status is None or status >= 400)
+    return {
+        'base_url': base_url,
+        'concurrency': concurrency,
+        'requests': len(samples),
+        'elapsed_seconds': round(elapsed, 3),
+        'throughput_rps': round(len(samples) / elapsed, 1) if elapsed else None,
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'overall': summarize_latencies([ms for _, ms, _ in samples]),
+        'endpoints': endpoints,
+    }
+
+
+def _connect(base, timeout):
+    if base.scheme == 'https':
+        return http.client.HTTPSConnection(base.netloc, timeout=timeout)
+    return http.client.HTTPConnection(base.netloc, timeout=timeout)
@@ -0,0 +1,29 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from people import preflight
+
+
+class Command(BaseCommand):
+    help = 'Dry run of an import: profiles a bank file and says whether it would be accepted, without touching the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--workers', type=int, help='Scanner processes (default: one per core)')
+        parser.add_argument('--max-bytes', type=int, help='Scan only this much of a CSV file and extrapolate')
+        parser.add_argument('--max-skipped-rate', type=float, default=preflight.MAX_SKIPPED_RATE)
+        parser.add_argument('--max-malformed-rate', type=float, default=preflight.MAX_MALFORMED_RATE)
+        parser.add_argument('--output', help='Write the JSON report to this path as well')
+
+    def handle(self, *args, **options):
+        try:
+            report = preflight.scan_file(options['path'], workers=options['workers'], max_bytes=options['max_bytes'])
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot scan {options["path"]}: {e}')
+        report['reasons'] = preflight.verdict(report, options['max_skipped_rate'], options['max_malformed_rate'])
+        report['accepted'] = not report['reasons']
+
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
@@ -0,0 +1,17 @@
+import json
+import time
+from django.core.management.base import BaseCommand
+from people.identity import BATCH_SIZE, rebuild_identities
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the cross-bank PersonIdentity table from the per-bank person tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='National codes per transaction')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        codes = rebuild_identities(batch_size=options['batch_size'])
+        report = {'national_codes': codes, 'seconds': round(time.perf_counter() - started, 3)}
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,17 @@
+import json
+import time
+from django.core.management.base import BaseCommand
+from people.indexes import rebuild_deferrable_indexes
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuilds, without blocking writes, the search indexes a bulk-load import dropped '
+        '(e.g. after a worker died before it could rebuild them)'
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rebuilt = rebuild_deferrable_indexes()
+        report = {'rebuilt': rebuilt, 'seconds': round(time.perf_counter() - started, 3)}
+        self.stdout.write(json.dumps(report, indent=2))
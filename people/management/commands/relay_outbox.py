@@ -0,0 +1,54 @@
+import json
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from people import metrics, outbox
+from people.metrics import start_worker_metrics_server
+from people.models import OutboxEvent
+
+
+class Command(BaseCommand):
+    help = 'Publishes queued person, card and phone number changes to the people.changes RabbitMQ exchange'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=outbox.BATCH_SIZE, help='Events per transaction')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to wait when the outbox is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the outbox, print a JSON report and exit')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            started = time.perf_counter()
+            connection, channel = outbox.connect()
+            published = self._drain(channel, options['batch_size'])
+            connection.close()
+            report = {'published': published, 'seconds': round(time.perf_counter() - started, 3)}
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        port = start_worker_metrics_server()
+        self.stdout.write(f'Serving relay metrics on :{port}/metrics')
+        while True:
+            try:
+                connection, channel = outbox.connect()
+                self.stdout.write(f'Relaying the outbox to the {outbox.EXCHANGE} exchange')
+                while True:
+                    # Outside a request cycle; recycle expired or broken connections
+                    close_old_connections()
+                    self._drain(channel, options['batch_size'])
+                    metrics.OUTBOX_BACKLOG.set(OutboxEvent.objects.count())
+                    # Keeps the broker connection's heartbeats answered while idle
+                    connection.sleep(options['interval'])
+            except KeyboardInterrupt:
+                self.stdout.write('Relay stopped by user')
+                break
+            except Exception as e:
+                self.stdout.write(f'Error: {e}. Restarting in 5 seconds...')
+                time.sleep(5)
+
+    def _drain(self, channel, batch_size):
+        published = 0
+        while True:
+            count = outbox.relay_batch(channel, batch_size)
+            published += count
+            if count < batch_size:
+                return published
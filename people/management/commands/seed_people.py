@@ -0,0 +1,94 @@
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from people.models import CreditCard, Person, PhoneNumber, Source
+from people.normalization import normalize_search_text
+from people.synthetic import generate_rows
+from people.tasks import normalize_row
+
+
+class Command(BaseCommand):
+    help = 'Bulk-loads synthetic people with cards and phone numbers for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--people', type=int, default=1000000)
+        parser.add_argument('--source', default=Source.UNKNOWN, choices=Source.values)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--multi-phone-rate', type=float, default=0.3)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--offset',
+            type=int,
+            default=0,
+            help='Start of the generated identifier range; use a new offset to add to an existing seed',
+        )
+
+    def handle(self, *args, **options):
+        # Clean rows only: the quirks belong to the import benchmark, not the API data
+        rows = generate_rows(
+            options['people'],
+            duplicate_rate=0,
+            scientific_rate=0,
+            mojibake_rate=0,
+            multi_phone_rate=options['multi_phone_rate'],
+            seed=options['seed'],
+            offset=options['offset'],
+        )
+        source = options['source']
+        totals = {'people': 0, 'cards': 0, 'phones': 0}
+        started = time.perf_counter()
+
+        batch = []
+        for row in rows:
+            record = normalize_row(row)
+            if record is not None:
+                batch.append(record)
+            if len(batch) >= options['batch_size']:
+                self._insert(batch, source, totals)
+                batch = []
+        if batch:
+            self._insert(batch, source, totals)
+
+        elapsed = time.perf_counter() - started
+        report = {
+            'source': source,
+            **totals,
+            'seconds': round(elapsed, 3),
+            'people_per_sec': round(totals['people'] / elapsed) if elapsed else None,
+        }
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def _insert(self, records, source, totals):
+        people = [
+            Person(
+                national_code=record['national_code'],
+                first_name=record['first_name'],
+                last_name=record['last_name'],
+                birthdate=record['birthdate'],
+                source=source,
+                # bulk_create skips save(), so fill the search column here
+                search_name=normalize_search_text(record['first_name'], record['last_name']),
+            )
+            for record in records
+        ]
+        try:
+            with transaction.atomic():
+                Person.objects.bulk_create(people)
+                cards = [
+                    CreditCard(card_number=record['card_number'], person=person, source=source)
+                    for person, record in zip(people, records)
+                    if record['card_number']
+                ]
+                phones = [
+                    PhoneNumber(number=number, person=person, source=source)
+                    for person, record in zip(people, records)
+                    for number in record['mobiles']
+                ]
+                CreditCard.objects.bulk_create(cards)
+                PhoneNumber.objects.bulk_create(phones, ignore_conflicts=True)
+        except IntegrityError as e:
+            raise CommandError(f'Seed collides with existing rows, rerun with a different --offset: {e}')
+        totals['people'] += len(people)
+        totals['cards'] += len(cards)
+        totals['phones'] += len(phones)
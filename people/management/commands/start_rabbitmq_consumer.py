@@ -1,12 +1,15 @@
 import os
 import time
 from django.core.management.base import BaseCommand
+from people.metrics import start_worker_metrics_server
 from people.tasks import start_rabbitmq_consumer
 
 class Command(BaseCommand):
     help = 'Starts the RabbitMQ consumer for import processing'
 
     def handle(self, *args, **options):
+        port = start_worker_metrics_server()
+        self.stdout.write(f'Serving worker metrics on :{port}/metrics')
         self.stdout.write('Starting RabbitMQ consumer...')
         self.stdout.write('Press Ctrl+C to exit')
         
@@ -0,0 +1,74 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from people.models import CreditCard, Person, PhoneNumber
+
+MB = 1024 * 1024
+
+
+class Command(BaseCommand):
+    help = 'Reports heap and per-index sizes of the people tables (summed over partitions)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Write the JSON report to this path as well')
+        parser.add_argument('--compare', help='Earlier report to diff against, e.g. one taken before a migration')
+
+    def handle(self, *args, **options):
+        report = {model._meta.db_table: table_sizes(model._meta.db_table) for model in (Person, CreditCard, PhoneNumber)}
+
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    before = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Cannot read {options["compare"]}: {e}')
+            report = {table: _diff(before.get(table), sizes) for table, sizes in report.items()}
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
+
+
+def table_sizes(table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT coalesce(sum(c.reltuples) FILTER (WHERE c.reltuples > 0), 0), '
+            'sum(pg_table_size(t.relid)), sum(pg_indexes_size(t.relid)) '
+            'FROM pg_partition_tree(%s::regclass) t JOIN pg_class c ON c.oid = t.relid WHERE t.isleaf',
+            [table],
+        )
+        rows, heap, indexes = cursor.fetchone()
+        cursor.execute(
+            'SELECT c.relname, (SELECT sum(pg_relation_size(p.relid)) FROM pg_partition_tree(i.indexrelid) p) '
+            'FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid '
+            'WHERE i.indrelid = %s::regclass ORDER BY c.relname',
+            [table],
+        )
+        index_sizes = {name: round(int(size or 0) / MB, 2) for name, size in cursor.fetchall()}
+    rows = int(rows)
+    heap = int(heap or 0)
+    return {
+        'rows_estimate': rows,
+        'heap_mb': round(heap / MB, 2),
+        'indexes_mb': round(int(indexes or 0) / MB, 2),
+        'heap_bytes_per_row': round(heap / rows, 1) if rows else None,
+        'indexes': index_sizes,
+    }
+
+
+def _diff(before, after):
+    if not before:
+        return after
+    result = {}
+    for key, value in after.items():
+        if key == 'indexes':
+            names = sorted(set(value) | set(before.get('indexes', {})))
+            result[key] = {
+                name: {'before': before['indexes'].get(name), 'after': value.get(name)}
+                for name in names
+            }
+        else:
+            result[key] = {'before': before.get(key), 'after': value}
+    return result
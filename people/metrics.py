@@ -0,0 +1,35 @@
+import os
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+# Import pipeline metrics. The web process (import_chunks) exposes them on
+# WEB_METRICS_PORT (see gunicorn.conf.py); the RabbitMQ worker serves its own
+# registry on WORKER_METRICS_PORT.
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+CHUNKS_PUBLISHED = Counter(
+    'import_chunks_published_total', 'Import chunks published to the broker', ['source']
+)
+CHUNKS_PROCESSED = Counter(
+    'import_chunks_processed_total', 'Import chunks handled by workers', ['source', 'status']
+)
+ROWS_WRITTEN = Counter('import_rows_written_total', 'Rows written by import workers', ['source'])
+ROWS_SKIPPED = Counter('import_rows_skipped_total', 'Rows rejected during normalization', ['source'])
+STAGE_SECONDS = Histogram(
+    'import_stage_duration_seconds', 'Time spent per import stage and chunk', ['stage'], buckets=STAGE_BUCKETS
+)
+CHUNKS_IN_FLIGHT = Gauge('import_chunks_in_flight', 'Chunks currently being processed')
+JOBS_IN_FLIGHT = Gauge('import_jobs_in_flight', 'Import jobs in PROCESSING state')
+QUEUE_DEPTH = Gauge('import_queue_depth', 'Messages waiting in import_queue')
+
+# Change feed relay (people.outbox)
+OUTBOX_EVENTS_PUBLISHED = Counter(
+    'outbox_events_published_total', 'Change events published to the people.changes exchange', ['event']
+)
+OUTBOX_BACKLOG = Gauge('outbox_backlog', 'Change events waiting in the outbox table')
+
+
+def start_worker_metrics_server(port=None) -> int:
+    port = int(port or os.environ.get('WORKER_METRICS_PORT', '9100'))
+    start_http_server(port)
+    return port
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.1 on 2026-10-19 14:41
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes CONCURRENTLY so existing tables stay writable
+    atomic = False
+
+    dependencies = [
+        ('people', '0005_importjob'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name='creditcard',
+            index=models.Index(fields=['source', 'id'], name='idx_creditcard_source_id'),
+        ),
+        AddIndexConcurrently(
+            model_name='creditcard',
+            index=models.Index(fields=['card_number'], name='idx_creditcard_number_prefix', opclasses=['varchar_pattern_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='creditcard',
+            index=models.Index(django.db.models.functions.text.Right('card_number', 4), name='idx_creditcard_last4'),
+        ),
+        AddIndexConcurrently(
+            model_name='person',
+            index=models.Index(fields=['source', 'id'], name='idx_person_source_id'),
+        ),
+        AddIndexConcurrently(
+            model_name='person',
+            index=models.Index(fields=['birthdate'], name='idx_person_birthdate'),
+        ),
+        AddIndexConcurrently(
+            model_name='person',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('first_name'), name='gin_trgm_ops'), name='idx_person_first_name_trgm'),
+        ),
+        AddIndexConcurrently(
+            model_name='phonenumber',
+            index=models.Index(fields=['source', 'id'], name='idx_phone_source_id'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.1 on 2026-10-19 14:42
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models, transaction
+
+from people.normalization import normalize_search_text
+
+BATCH_SIZE = 5000
+
+
+def backfill_search_name(apps, schema_editor):
+    Person = apps.get_model('people', 'Person')
+    last_id = 0
+    while True:
+        # One short transaction per batch so the table is never locked for long
+        with transaction.atomic():
+            batch = list(
+                Person.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .only('id', 'first_name', 'last_name')[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            for person in batch:
+                person.search_name = normalize_search_text(person.first_name, person.last_name)
+            Person.objects.bulk_update(batch, ['search_name'])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('people', '0006_people_api_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='person',
+            name='search_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=300),
+        ),
+        migrations.RunPython(backfill_search_name, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='person',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_name'], name='idx_person_search_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
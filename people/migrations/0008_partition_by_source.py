@@ -0,0 +1,120 @@
+# Generated by Django 5.1.1 on 2026-10-19 14:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from people.partitions import create_partitions
+
+# Source values at the time of this migration; a source added later needs its
+# own migration calling create_partitions() (until then it lands in _default)
+SOURCES = ['UNKNOWN', 'MELLI', 'SADERAT', 'MELLAT']
+
+# Parent first
+MODELS = ['Person', 'CreditCard', 'PhoneNumber']
+
+FOREIGN_KEYS = [
+    ('CreditCard', 'people_creditcard_person_source_fk'),
+    ('PhoneNumber', 'people_phonenumber_person_source_fk'),
+]
+
+
+def partition_tables(apps, schema_editor):
+    """
+    Rebuild person, credit card and phone number as LIST partitioned tables.
+
+    Runs in the migration's transaction and holds ACCESS EXCLUSIVE on all three
+    tables while the rows are copied, so plan it for a maintenance window.
+    """
+    qn = schema_editor.quote_name
+    models_ = [apps.get_model('people', name) for name in MODELS]
+    person_table = models_[0]._meta.db_table
+
+    with schema_editor.connection.cursor() as cursor:
+        # Unique keys and the children's foreign keys must include the
+        # partition key, so a card or phone can only point at a person of
+        # its own source
+        for name, _ in FOREIGN_KEYS:
+            table = apps.get_model('people', name)._meta.db_table
+            cursor.execute(
+                f'SELECT count(*) FROM {qn(table)} c JOIN {qn(person_table)} p ON p.id = c.person_id '
+                'WHERE p.source <> c.source'
+            )
+            mismatched = cursor.fetchone()[0]
+            if mismatched:
+                raise RuntimeError(
+                    f'{mismatched} rows in {table} have a different source than their person; '
+                    'fix them before partitioning'
+                )
+
+        for model in models_:
+            table = model._meta.db_table
+            cursor.execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(table + "_unpartitioned")}')
+            cursor.execute(
+                f'CREATE TABLE {qn(table)} (LIKE {qn(table + "_unpartitioned")} INCLUDING DEFAULTS) '
+                'PARTITION BY LIST (source)'
+            )
+            create_partitions(cursor, table, SOURCES)
+            cursor.execute(f'INSERT INTO {qn(table)} SELECT * FROM {qn(table + "_unpartitioned")}')
+
+        # Children first: their old foreign keys point at the old person table
+        for model in reversed(models_):
+            cursor.execute(f'DROP TABLE {qn(model._meta.db_table + "_unpartitioned")}')
+
+        for model in models_:
+            table = model._meta.db_table
+            # A plain sequence rather than an identity column, so REPLACE
+            # imports' staging tables can share it through their defaults
+            sequence = f'{table}_id_seq'
+            cursor.execute(f'CREATE SEQUENCE {qn(sequence)} OWNED BY {qn(table)}.id')
+            cursor.execute(f'SELECT setval(%s, coalesce(max(id), 0) + 1, false) FROM {qn(table)}', [sequence])
+            cursor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN id SET DEFAULT nextval('{sequence}'::regclass)")
+            # id alone stays unique in practice (one sequence), but PostgreSQL
+            # only accepts keys that contain the partition key
+            cursor.execute(f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(table + "_pkey")} PRIMARY KEY (id, source)')
+
+    for model in models_:
+        for constraint in model._meta.constraints:
+            schema_editor.add_constraint(model, constraint)
+        for sql in schema_editor._model_indexes_sql(model):
+            schema_editor.execute(sql)
+
+    with schema_editor.connection.cursor() as cursor:
+        for name, constraint in FOREIGN_KEYS:
+            table = apps.get_model('people', name)._meta.db_table
+            cursor.execute(
+                f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(constraint)} '
+                f'FOREIGN KEY (person_id, source) REFERENCES {qn(person_table)} (id, source) '
+                'ON UPDATE CASCADE ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED'
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0007_person_search_name'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='creditcard',
+                    name='person',
+                    field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='credit_cards', to='people.person'),
+                ),
+                migrations.AlterField(
+                    model_name='phonenumber',
+                    name='person',
+                    field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='phone_numbers', to='people.person'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(partition_tables),
+            ],
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='mode',
+            field=models.CharField(choices=[('MERGE', 'Merge'), ('REPLACE', 'Replace')], default='MERGE', max_length=16),
+        ),
+    ]
@@ -0,0 +1,207 @@
+# Generated by Django 5.1.1 on 2026-10-19 14:56
+
+import django.core.validators
+import django.db.models.functions.math
+import people.fields
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 5000
+
+# Everything in the database that covers the converted columns, rebuilt on
+# the bigint column. {col} is the column being converted.
+# idx_creditcard_number_prefix is not rebuilt: prefix searches are now ranges
+# served by uniq_creditcard_number_source.
+COLUMNS = {
+    'Person': {
+        'column': 'national_code',
+        'unique': [('uniq_person_national_code_source', '({col}, source)')],
+        'indexes': [('idx_person_natcode_source', '({col}, source)')],
+    },
+    'CreditCard': {
+        'column': 'card_number',
+        'unique': [('uniq_creditcard_number_source', '({col}, source)')],
+        'indexes': [
+            ('idx_creditcard_number_source', '({col}, source)'),
+            ('idx_creditcard_last4', '(MOD({col}, 10000))'),
+        ],
+    },
+}
+
+
+def _tables(apps):
+    for model_name, spec in COLUMNS.items():
+        yield apps.get_model('people', model_name)._meta.db_table, spec['column'], spec
+
+
+def _partitions(cursor, table):
+    cursor.execute(
+        'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+        'WHERE i.inhparent = %s::regclass ORDER BY c.relname',
+        [table],
+    )
+    return [name for (name,) in cursor.fetchall()]
+
+
+def add_shadow_columns(apps, schema_editor):
+    qn = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        for table, column, _ in _tables(apps):
+            shadow = f'{column}_compact'
+            sync = f'{table}_{shadow}_sync'
+            cursor.execute(f'ALTER TABLE {qn(table)} ADD COLUMN IF NOT EXISTS {qn(shadow)} bigint')
+            # Keeps rows written while the backfill runs in step
+            cursor.execute(
+                f'CREATE OR REPLACE FUNCTION {qn(sync)}() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN '
+                f"NEW.{qn(shadow)} := CASE WHEN NEW.{qn(column)} ~ '^[0-9]{{1,18}}$' THEN NEW.{qn(column)}::bigint END; "
+                'RETURN NEW; END $$'
+            )
+            cursor.execute(f'DROP TRIGGER IF EXISTS {qn(sync)} ON {qn(table)}')
+            cursor.execute(
+                f'CREATE TRIGGER {qn(sync)} BEFORE INSERT OR UPDATE OF {qn(column)} ON {qn(table)} '
+                f'FOR EACH ROW EXECUTE FUNCTION {qn(sync)}()'
+            )
+
+
+def backfill(apps, schema_editor):
+    qn = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        for table, column, _ in _tables(apps):
+            shadow = f'{column}_compact'
+            last_id = 0
+            while True:
+                # Autocommitted batches (the migration is not atomic), so row
+                # locks are short and vacuum can keep up
+                cursor.execute(
+                    f'UPDATE {qn(table)} SET {qn(shadow)} = CASE WHEN {qn(column)} ~ %s THEN {qn(column)}::bigint END '
+                    f'WHERE id IN (SELECT id FROM {qn(table)} WHERE id > %s ORDER BY id LIMIT %s) RETURNING id',
+                    ['^[0-9]{1,18}$', last_id, BATCH_SIZE],
+                )
+                ids = [row[0] for row in cursor.fetchall()]
+                if not ids:
+                    break
+                last_id = max(ids)
+
+            cursor.execute(f'SELECT count(*) FROM {qn(table)} WHERE {qn(shadow)} IS NULL')
+            invalid = cursor.fetchone()[0]
+            if invalid:
+                raise RuntimeError(
+                    f'{invalid} rows in {table} have a {column} that is not all digits; '
+                    'fix them and run the migration again'
+                )
+
+
+def build_indexes(apps, schema_editor):
+    """Build the new indexes and NOT NULL proofs partition by partition, without blocking writes."""
+    qn = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        for table, column, spec in _tables(apps):
+            shadow = f'{column}_compact'
+            for partition in _partitions(cursor, table):
+                for name, columns in spec['unique'] + spec['indexes']:
+                    index = f'{partition}_{name}'
+                    unique = 'UNIQUE ' if (name, columns) in spec['unique'] else ''
+                    # A failed concurrent build leaves an invalid index behind
+                    cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {qn(index)}')
+                    cursor.execute(
+                        f'CREATE {unique}INDEX CONCURRENTLY {qn(index)} ON {qn(partition)} '
+                        + columns.format(col=qn(shadow))
+                    )
+                check = f'{partition}_{shadow}_not_null'
+                cursor.execute(f'ALTER TABLE {qn(partition)} DROP CONSTRAINT IF EXISTS {qn(check)}')
+                cursor.execute(
+                    f'ALTER TABLE {qn(partition)} ADD CONSTRAINT {qn(check)} CHECK ({qn(shadow)} IS NOT NULL) NOT VALID'
+                )
+                # VALIDATE only takes SHARE UPDATE EXCLUSIVE; the proven CHECK
+                # lets SET NOT NULL skip its table scan during the swap
+                cursor.execute(f'ALTER TABLE {qn(partition)} VALIDATE CONSTRAINT {qn(check)}')
+
+
+def swap_columns(apps, schema_editor):
+    """Replace the varchar columns with the bigint ones in one short transaction."""
+    qn = schema_editor.quote_name
+    connection = schema_editor.connection
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute("SET LOCAL lock_timeout = '10s'")
+        for table, column, spec in _tables(apps):
+            shadow = f'{column}_compact'
+            sync = f'{table}_{shadow}_sync'
+            partitions = _partitions(cursor, table)
+            cursor.execute(f'DROP TRIGGER {qn(sync)} ON {qn(table)}')
+            cursor.execute(f'DROP FUNCTION {qn(sync)}()')
+            # Also drops every constraint and index on the old column
+            cursor.execute(f'ALTER TABLE {qn(table)} DROP COLUMN {qn(column)}')
+            cursor.execute(f'ALTER TABLE {qn(table)} RENAME COLUMN {qn(shadow)} TO {qn(column)}')
+            cursor.execute(f'ALTER TABLE {qn(table)} ALTER COLUMN {qn(column)} SET NOT NULL')
+            for partition in partitions:
+                cursor.execute(f'ALTER TABLE {qn(partition)} DROP CONSTRAINT {qn(f"{partition}_{shadow}_not_null")}')
+                for name, _ in spec['unique']:
+                    index = f'{partition}_{name}'
+                    cursor.execute(f'ALTER TABLE {qn(partition)} ADD CONSTRAINT {qn(index)} UNIQUE USING INDEX {qn(index)}')
+            # On a partitioned table both statements adopt the matching
+            # partition constraints and indexes built above instead of
+            # building new ones
+            for name, columns in spec['unique']:
+                cursor.execute(
+                    f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} UNIQUE ' + columns.format(col=qn(column))
+                )
+            for name, columns in spec['indexes']:
+                cursor.execute(f'CREATE INDEX {qn(name)} ON {qn(table)} ' + columns.format(col=qn(column)))
+
+    with connection.cursor() as cursor:
+        for table, _, _ in _tables(apps):
+            cursor.execute(f'ANALYZE {qn(table)}')
+
+
+class Migration(migrations.Migration):
+    """
+    Store national codes and card numbers as bigint instead of varchar.
+
+    Online: a shadow column is added and kept in sync by a trigger, backfilled
+    in batches, indexed CONCURRENTLY partition by partition, and swapped in
+    with a short lock at the end. Do not run REPLACE imports meanwhile: their
+    staging tables are copied from the old table layout. Dropped columns keep
+    their space in existing heap tuples until the rows are rewritten, so the
+    heap only shrinks after a REPLACE import or VACUUM FULL of each partition;
+    the index savings are immediate. Compare `manage.py table_sizes` output
+    from before and after.
+    """
+    atomic = False
+
+    dependencies = [
+        ('people', '0008_partition_by_source'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveIndex(
+                    model_name='creditcard',
+                    name='idx_creditcard_number_prefix',
+                ),
+                migrations.RemoveIndex(
+                    model_name='creditcard',
+                    name='idx_creditcard_last4',
+                ),
+                migrations.AlterField(
+                    model_name='creditcard',
+                    name='card_number',
+                    field=people.fields.ZeroPaddedDigitsField(digits=16, validators=[django.core.validators.RegexValidator('^\\d{16}$', 'Card number must be 16 digits')]),
+                ),
+                migrations.AlterField(
+                    model_name='person',
+                    name='national_code',
+                    field=people.fields.ZeroPaddedDigitsField(digits=10, help_text='10-digit national identification code', validators=[django.core.validators.RegexValidator('^\\d{10}$', 'National code must be 10 digits')]),
+                ),
+                migrations.AddIndex(
+                    model_name='creditcard',
+                    index=models.Index(django.db.models.functions.math.Mod('card_number', 10000, output_field=models.BigIntegerField()), name='idx_creditcard_last4'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(add_shadow_columns),
+                migrations.RunPython(backfill),
+                migrations.RunPython(build_indexes),
+                migrations.RunPython(swap_columns),
+            ],
+        ),
+    ]
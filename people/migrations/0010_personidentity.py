@@ -0,0 +1,33 @@
+# Generated by Django 5.1.1 on 2026-10-19 14:59
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import people.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0009_compact_identifiers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PersonIdentity',
+            fields=[
+                ('national_code', people.fields.ZeroPaddedDigitsField(digits=10, primary_key=True, serialize=False)),
+                ('first_name', models.CharField(blank=True, max_length=150)),
+                ('last_name', models.CharField(blank=True, max_length=150, null=True)),
+                ('birthdate', models.DateField(blank=True, null=True)),
+                ('sources', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(choices=[('UNKNOWN', 'Unknown'), ('MELLI', 'Melli'), ('SADERAT', 'Saderat'), ('MELLAT', 'Mellat')], max_length=32), default=list, size=None)),
+                ('source_count', models.PositiveSmallIntegerField(default=0)),
+                ('card_count', models.PositiveIntegerField(default=0)),
+                ('phone_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['sources'], name='idx_identity_sources'), models.Index(fields=['source_count'], name='idx_identity_source_count')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0010_personidentity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='reader',
+            field=models.CharField(choices=[('PANDAS', 'pandas'), ('ARROW', 'pyarrow')], default='PANDAS', max_length=16),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0011_importjob_reader'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='preflight',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='importjob',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('CHECKED', 'Checked'), ('REJECTED', 'Rejected'), ('PROCESSING', 'Processing'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', max_length=20),
+        ),
+    ]
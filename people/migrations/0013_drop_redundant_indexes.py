@@ -0,0 +1,50 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Drop indexes that duplicate another B-tree on every row written:
+    idx_person_natcode_source, idx_creditcard_number_source and
+    idx_phone_num_per_src repeat the columns of the unique constraints, and
+    the (source, id) indexes repeat the (id, source) primary key now that each
+    source is its own partition. DROP INDEX on a partitioned index removes the
+    partitions' copies too.
+    """
+
+    dependencies = [
+        ('people', '0012_importjob_preflight'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='creditcard',
+            name='idx_creditcard_number_source',
+        ),
+        migrations.RemoveIndex(
+            model_name='creditcard',
+            name='idx_creditcard_source_id',
+        ),
+        migrations.RemoveIndex(
+            model_name='person',
+            name='idx_person_natcode_source',
+        ),
+        migrations.RemoveIndex(
+            model_name='person',
+            name='idx_person_source_id',
+        ),
+        migrations.RemoveIndex(
+            model_name='phonenumber',
+            name='idx_phone_num_per_src',
+        ),
+        migrations.RemoveIndex(
+            model_name='phonenumber',
+            name='idx_phone_source_id',
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='defer_indexes',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,146 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:20
+
+import django.db.models.functions.datetime
+import people.fields
+from django.db import migrations, models
+
+TRACKED = {'people_person': 'person', 'people_creditcard': 'creditcard', 'people_phonenumber': 'phonenumber'}
+
+
+def add_version_sql(table):
+    # A constant default is stored in the catalog; the volatile one only
+    # applies to rows inserted afterwards, so no existing partition is rewritten
+    return [
+        f'ALTER TABLE {table} ADD COLUMN version bigint NOT NULL DEFAULT 0',
+        f'ALTER TABLE {table} ALTER COLUMN version SET DEFAULT (pg_current_xact_id()::text::bigint)',
+    ]
+
+
+def drop_version_sql(table):
+    return [f'ALTER TABLE {table} DROP COLUMN version']
+
+
+# Row triggers on a partitioned table are cloned to every partition, including
+# the staging tables a REPLACE import attaches later
+CREATE_TRIGGERS = [
+    """
+    CREATE FUNCTION people_stamp_version() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'UPDATE' THEN
+            NEW.version := OLD.version;
+            NEW.updated_at := OLD.updated_at;
+            -- The importer re-saves unchanged rows; they keep their version
+            IF NEW IS NOT DISTINCT FROM OLD THEN
+                RETURN NEW;
+            END IF;
+        END IF;
+        NEW.version := pg_current_xact_id()::text::bigint;
+        NEW.updated_at := statement_timestamp();
+        RETURN NEW;
+    END
+    $$
+    """,
+    """
+    CREATE FUNCTION people_record_tombstone() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO people_tombstone (resource, object_id, source) VALUES (TG_ARGV[0], OLD.id, OLD.source);
+        RETURN OLD;
+    END
+    $$
+    """,
+    *(
+        f'CREATE TRIGGER {table}_version BEFORE INSERT OR UPDATE ON {table} '
+        'FOR EACH ROW EXECUTE FUNCTION people_stamp_version()'
+        for table in TRACKED
+    ),
+    *(
+        f'CREATE TRIGGER {table}_tombstone AFTER DELETE ON {table} '
+        f"FOR EACH ROW EXECUTE FUNCTION people_record_tombstone('{resource}')"
+        for table, resource in TRACKED.items()
+    ),
+]
+
+DROP_TRIGGERS = [
+    *(f'DROP TRIGGER {table}_version ON {table}' for table in TRACKED),
+    *(f'DROP TRIGGER {table}_tombstone ON {table}' for table in TRACKED),
+    'DROP FUNCTION people_record_tombstone()',
+    'DROP FUNCTION people_stamp_version()',
+]
+
+
+class Migration(migrations.Migration):
+    """
+    Change tracking for incremental sync (people.changes): a version and
+    updated_at on persons, cards and phone numbers, set by a trigger, and an
+    AFTER DELETE trigger that records tombstones. Existing rows start at
+    version 0 and the migration's timestamp; neither column rewrites a table.
+    The (version, id) indexes are built online by 0016_version_indexes.
+    """
+
+    dependencies = [
+        ('people', '0013_drop_redundant_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(max_length=32)),
+                ('object_id', models.BigIntegerField(null=True)),
+                ('source', models.CharField(choices=[('UNKNOWN', 'Unknown'), ('MELLI', 'Melli'), ('SADERAT', 'Saderat'), ('MELLAT', 'Mellat')], max_length=32)),
+                ('version', models.BigIntegerField(db_default=people.fields.TransactionVersion())),
+                ('deleted_at', models.DateTimeField(db_default=django.db.models.functions.datetime.Now())),
+            ],
+        ),
+        migrations.AddField(
+            model_name='creditcard',
+            name='updated_at',
+            field=models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunSQL(add_version_sql('people_creditcard'), drop_version_sql('people_creditcard'))],
+            state_operations=[
+                migrations.AddField(
+                    model_name='creditcard',
+                    name='version',
+                    field=models.BigIntegerField(db_default=people.fields.TransactionVersion(), editable=False),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='updated_at',
+            field=models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunSQL(add_version_sql('people_person'), drop_version_sql('people_person'))],
+            state_operations=[
+                migrations.AddField(
+                    model_name='person',
+                    name='version',
+                    field=models.BigIntegerField(db_default=people.fields.TransactionVersion(), editable=False),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='phonenumber',
+            name='updated_at',
+            field=models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunSQL(add_version_sql('people_phonenumber'), drop_version_sql('people_phonenumber'))],
+            state_operations=[
+                migrations.AddField(
+                    model_name='phonenumber',
+                    name='version',
+                    field=models.BigIntegerField(db_default=people.fields.TransactionVersion(), editable=False),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['resource', 'version', 'object_id'], name='idx_tombstone_resource_version'),
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
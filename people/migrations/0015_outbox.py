@@ -0,0 +1,68 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:22
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+TRACKED = {'people_person': 'person', 'people_creditcard': 'creditcard', 'people_phonenumber': 'phonenumber'}
+
+CREATE_TRIGGERS = [
+    """
+    CREATE FUNCTION people_record_outbox() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            INSERT INTO people_outboxevent (event, payload)
+            VALUES (TG_ARGV[0] || '.deleted', to_jsonb(OLD) - 'search_name');
+            RETURN NULL;
+        END IF;
+        -- A save that changed nothing. Versions cannot tell: a transaction
+        -- that updates a row twice (the importer, once per file row of a
+        -- national code) stamps the same version both times
+        IF TG_OP = 'UPDATE'
+            AND (to_jsonb(NEW) - 'version' - 'updated_at') IS NOT DISTINCT FROM (to_jsonb(OLD) - 'version' - 'updated_at') THEN
+            RETURN NULL;
+        END IF;
+        INSERT INTO people_outboxevent (event, payload)
+        VALUES (
+            TG_ARGV[0] || CASE TG_OP WHEN 'INSERT' THEN '.created' ELSE '.updated' END,
+            to_jsonb(NEW) - 'search_name'
+        );
+        RETURN NULL;
+    END
+    $$
+    """,
+    *(
+        f'CREATE TRIGGER {table}_outbox AFTER INSERT OR UPDATE OR DELETE ON {table} '
+        f"FOR EACH ROW EXECUTE FUNCTION people_record_outbox('{resource}')"
+        for table, resource in TRACKED.items()
+    ),
+]
+
+DROP_TRIGGERS = [
+    *(f'DROP TRIGGER {table}_outbox ON {table}' for table in TRACKED),
+    'DROP FUNCTION people_record_outbox()',
+]
+
+
+class Migration(migrations.Migration):
+    """
+    Transactional outbox: every insert, real update and delete of a person,
+    card or phone number queues an OutboxEvent in the same transaction, for
+    ``manage.py relay_outbox`` to publish.
+    """
+
+    dependencies = [
+        ('people', '0014_change_tracking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(max_length=64)),
+                ('payload', models.JSONField()),
+                ('created_at', models.DateTimeField(db_default=django.db.models.functions.datetime.Now())),
+            ],
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
@@ -0,0 +1,89 @@
+from django.db import migrations, models
+
+# (version, id) keyset indexes behind people.changes, on the largest tables
+INDEXES = {
+    'people_person': 'idx_person_version',
+    'people_creditcard': 'idx_creditcard_version',
+    'people_phonenumber': 'idx_phonenumber_version',
+}
+
+
+def _partitions(cursor, table):
+    cursor.execute(
+        'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+        'WHERE i.inhparent = %s::regclass ORDER BY c.relname',
+        [table],
+    )
+    return [name for (name,) in cursor.fetchall()]
+
+
+def _state(cursor, name):
+    """None when the index does not exist, else whether it is valid."""
+    cursor.execute('SELECT i.indisvalid FROM pg_index i WHERE i.indexrelid = to_regclass(%s)', [name])
+    row = cursor.fetchone()
+    return None if row is None else row[0]
+
+
+def build_indexes(apps, schema_editor):
+    """
+    The parent index is created ON ONLY the parent (invalid, nothing built),
+    each partition's CONCURRENTLY and attached; the parent turns valid once
+    every partition has one. Writes go on throughout, and an interrupted run
+    picks up where it stopped.
+    """
+    qn = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        for table, index in INDEXES.items():
+            if _state(cursor, qn(index)):
+                continue
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {qn(index)} ON ONLY {qn(table)} (version, id)')
+            for partition in _partitions(cursor, table):
+                name = f'{partition}_{index}'
+                if _state(cursor, qn(name)) is False:
+                    # Left behind by an interrupted concurrent build
+                    cursor.execute(f'DROP INDEX CONCURRENTLY {qn(name)}')
+                cursor.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {qn(name)} ON {qn(partition)} (version, id)')
+                # A no-op when it is already attached
+                cursor.execute(f'ALTER INDEX {qn(index)} ATTACH PARTITION {qn(name)}')
+
+
+def drop_indexes(apps, schema_editor):
+    qn = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        for index in INDEXES.values():
+            # Takes the partitions' indexes with it
+            cursor.execute(f'DROP INDEX IF EXISTS {qn(index)}')
+
+
+class Migration(migrations.Migration):
+    """
+    (version, id) indexes for incremental sync, built partition by partition
+    without blocking writes, as 0009 and people.indexes build theirs.
+    """
+    atomic = False
+
+    dependencies = [
+        ('people', '0015_outbox'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='creditcard',
+                    index=models.Index(fields=['version', 'id'], name='idx_creditcard_version'),
+                ),
+                migrations.AddIndex(
+                    model_name='person',
+                    index=models.Index(fields=['version', 'id'], name='idx_person_version'),
+                ),
+                migrations.AddIndex(
+                    model_name='phonenumber',
+                    index=models.Index(fields=['version', 'id'], name='idx_phonenumber_version'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(build_indexes, drop_indexes),
+            ],
+        ),
+    ]
@@ -0,0 +1,57 @@
+from django.db import migrations
+
+from people.partitions import FOREIGN_KEY_ACTIONS, foreign_key_name, link_partitions
+
+# Foreign keys migration 0008 declared on the parent tables
+ROOT_FOREIGN_KEYS = {
+    'people_creditcard': 'people_creditcard_person_source_fk',
+    'people_phonenumber': 'people_phonenumber_person_source_fk',
+}
+
+
+def link(apps, schema_editor):
+    qn = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        # The partition keys are in place before the parent's go, so the
+        # children are never unchecked
+        link_partitions(cursor)
+        for table, constraint in ROOT_FOREIGN_KEYS.items():
+            cursor.execute(f'ALTER TABLE {qn(table)} DROP CONSTRAINT IF EXISTS {qn(constraint)}')
+
+
+def unlink(apps, schema_editor):
+    qn = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        for table, constraint in ROOT_FOREIGN_KEYS.items():
+            cursor.execute(
+                f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(constraint)} '
+                f'FOREIGN KEY (person_id, source) REFERENCES {qn("people_person")} (id, source) {FOREIGN_KEY_ACTIONS}'
+            )
+            cursor.execute(
+                'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+                'WHERE i.inhparent = %s::regclass',
+                [table],
+            )
+            for (partition,) in cursor.fetchall():
+                cursor.execute(
+                    f'ALTER TABLE {qn(partition)} DROP CONSTRAINT IF EXISTS {qn(foreign_key_name(partition))}'
+                )
+
+
+class Migration(migrations.Migration):
+    """
+    Move the cards' and phones' (person_id, source) foreign keys from the
+    parent tables to the partitions, each pointing at its source's person
+    partition, so a REPLACE swap's ATTACH PARTITION has nothing to validate
+    (see people.partitions). Online: the new keys are added NOT VALID and
+    validated before the parent keys are dropped.
+    """
+    atomic = False
+
+    dependencies = [
+        ('people', '0016_version_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(link, unlink),
+    ]
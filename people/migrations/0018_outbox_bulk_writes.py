@@ -0,0 +1,50 @@
+from django.db import migrations
+
+# people_record_outbox() from 0015, with BULK_CHECK at the top of its body
+FUNCTION = """
+    CREATE OR REPLACE FUNCTION people_record_outbox() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        BULK_CHECK
+        IF TG_OP = 'DELETE' THEN
+            INSERT INTO people_outboxevent (event, payload)
+            VALUES (TG_ARGV[0] || '.deleted', to_jsonb(OLD) - 'search_name');
+            RETURN NULL;
+        END IF;
+        -- A save that changed nothing. Versions cannot tell: a transaction
+        -- that updates a row twice (the importer, once per file row of a
+        -- national code) stamps the same version both times
+        IF TG_OP = 'UPDATE'
+            AND (to_jsonb(NEW) - 'version' - 'updated_at') IS NOT DISTINCT FROM (to_jsonb(OLD) - 'version' - 'updated_at') THEN
+            RETURN NULL;
+        END IF;
+        INSERT INTO people_outboxevent (event, payload)
+        VALUES (
+            TG_ARGV[0] || CASE TG_OP WHEN 'INSERT' THEN '.created' ELSE '.updated' END,
+            to_jsonb(NEW) - 'search_name'
+        );
+        RETURN NULL;
+    END
+    $$
+"""
+
+BULK_CHECK = """-- Bulk writers queue one source.updated event per transaction instead
+        -- (see people.outbox.record_bulk_write)
+        IF current_setting('people.outbox_bulk', true) = 'on' THEN
+            RETURN NULL;
+        END IF;"""
+
+
+class Migration(migrations.Migration):
+    """
+    Lets the import workers switch the per-row outbox triggers off for their
+    transaction: a MERGE import otherwise writes an event row for every row
+    it writes.
+    """
+
+    dependencies = [
+        ('people', '0017_partition_foreign_keys'),
+    ]
+
+    operations = [
+        migrations.RunSQL(FUNCTION.replace('BULK_CHECK', BULK_CHECK), FUNCTION.replace('        BULK_CHECK\n', '')),
+    ]
@@ -1,5 +1,10 @@
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Mod, Now, Upper
 from django.core.validators import RegexValidator
+from .fields import TransactionVersion, ZeroPaddedDigitsField
+from .normalization import normalize_search_text
 
 
 class Source(models.TextChoices):
@@ -12,44 +17,72 @@ class Source(models.TextChoices):
 class Person(models.Model):
 	first_name = models.CharField(max_length=150, blank=True)
 	last_name = models.CharField(max_length=150, blank=True, null=True)
-	national_code = models.CharField(
-		max_length=10,
+	national_code = ZeroPaddedDigitsField(
+		digits=10,
 		help_text='10-digit national identification code',
 		validators=[RegexValidator(r'^\d{10}$', 'National code must be 10 digits')]
 	)
 	birthdate = models.DateField(null=True, blank=True)
 	source = models.CharField(max_length=32, choices=Source.choices, default=Source.UNKNOWN)
+	# Folded first + last name (see normalize_search_text); kept in sync by save()
+	search_name = models.CharField(max_length=300, blank=True, default='', editable=False)
+	# Change tracking for ?since= readers (see people.changes); the database
+	# sets both on every insert and on updates that change the row
+	version = models.BigIntegerField(db_default=TransactionVersion(), editable=False)
+	updated_at = models.DateTimeField(db_default=Now(), editable=False)
 
 	class Meta:
 		constraints = [
 			models.UniqueConstraint(fields=['national_code', 'source'], name='uniq_person_national_code_source')
 		]
+		# National code lookups use the unique constraint; id order within a
+		# source is the (id, source) primary key of that source's partition
 		indexes = [
-			models.Index(fields=['national_code', 'source'], name='idx_person_natcode_source')
+			models.Index(fields=['birthdate'], name='idx_person_birthdate'),
+			# Trigram index for first_name__icontains, which Django emits as UPPER(...) LIKE UPPER(...)
+			GinIndex(OpClass(Upper('first_name'), name='gin_trgm_ops'), name='idx_person_first_name_trgm'),
+			GinIndex(fields=['search_name'], opclasses=['gin_trgm_ops'], name='idx_person_search_name_trgm'),
+			models.Index(fields=['version', 'id'], name='idx_person_version'),
 		]
 
 	def __str__(self) -> str:
 		return f"{self.first_name} {self.last_name}".strip() or f"Person {self.pk}"
 
+	def save(self, *args, **kwargs):
+		self.search_name = normalize_search_text(self.first_name, self.last_name)
+		update_fields = kwargs.get('update_fields')
+		if update_fields is not None and {'first_name', 'last_name'} & set(update_fields):
+			kwargs['update_fields'] = {*update_fields, 'search_name'}
+		super().save(*args, **kwargs)
+
 
 class CreditCard(models.Model):
-	card_number = models.CharField(
-		max_length=16,
+	card_number = ZeroPaddedDigitsField(
+		digits=16,
 		validators=[RegexValidator(r'^\d{16}$', 'Card number must be 16 digits')]
 	)
 	person = models.ForeignKey(
 		Person,
 		on_delete=models.CASCADE,
-		related_name='credit_cards'
+		related_name='credit_cards',
+		# Enforced in the database as (person_id, source) -> person (id, source),
+		# partition to partition (see people.partitions)
+		db_constraint=False,
 	)
 	source = models.CharField(max_length=32, choices=Source.choices, default=Source.UNKNOWN)
+	# Change tracking for ?since= readers (see people.changes); the database
+	# sets both on every insert and on updates that change the row
+	version = models.BigIntegerField(db_default=TransactionVersion(), editable=False)
+	updated_at = models.DateTimeField(db_default=Now(), editable=False)
 
 	class Meta:
 		constraints = [
 			models.UniqueConstraint(fields=['card_number', 'source'], name='uniq_creditcard_number_source')
 		]
 		indexes = [
-			models.Index(fields=['card_number', 'source'], name='idx_creditcard_number_source')
+			# Prefix searches are ranges on card_number, served by the unique constraint
+			models.Index(Mod('card_number', 10000, output_field=models.BigIntegerField()), name='idx_creditcard_last4'),
+			models.Index(fields=['version', 'id'], name='idx_creditcard_version'),
 		]
 
 	def __str__(self) -> str:
@@ -64,9 +97,16 @@ class PhoneNumber(models.Model):
 	person = models.ForeignKey(
 		Person,
 		on_delete=models.CASCADE,
-		related_name='phone_numbers'
+		related_name='phone_numbers',
+		# Enforced in the database as (person_id, source) -> person (id, source),
+		# partition to partition (see people.partitions)
+		db_constraint=False,
 	)
 	source = models.CharField(max_length=32, choices=Source.choices, default=Source.UNKNOWN)
+	# Change tracking for ?since= readers (see people.changes); the database
+	# sets both on every insert and on updates that change the row
+	version = models.BigIntegerField(db_default=TransactionVersion(), editable=False)
+	updated_at = models.DateTimeField(db_default=Now(), editable=False)
 
 	class Meta:
 		constraints = [
@@ -76,23 +116,106 @@ class PhoneNumber(models.Model):
 			)
 		]
 		indexes = [
-			models.Index(fields=['number', 'person', 'source'], name='idx_phone_num_per_src')
+			models.Index(fields=['version', 'id'], name='idx_phonenumber_version'),
 		]
 
 	def __str__(self) -> str:
 		return self.number
 
 
+class Tombstone(models.Model):
+	"""
+	A deleted person, card or phone number, written by a database trigger so
+	?since= readers learn about deletions. ``object_id`` is NULL when a REPLACE
+	import swapped in the whole source: its rows must be downloaded again.
+	"""
+	resource = models.CharField(max_length=32)  # model_name of the deleted row
+	object_id = models.BigIntegerField(null=True)
+	source = models.CharField(max_length=32, choices=Source.choices)
+	version = models.BigIntegerField(db_default=TransactionVersion())
+	deleted_at = models.DateTimeField(db_default=Now())
+
+	class Meta:
+		indexes = [
+			models.Index(fields=['resource', 'version', 'object_id'], name='idx_tombstone_resource_version'),
+		]
+
+	def __str__(self) -> str:
+		return f'{self.resource} {self.object_id or "*"} ({self.source})'
+
+
+class OutboxEvent(models.Model):
+	"""
+	A change to a person, card or phone number waiting to be published to
+	RabbitMQ. Written by database triggers in the writing transaction, deleted
+	by the relay once the broker confirmed it (see people.outbox).
+	"""
+	event = models.CharField(max_length=64)  # <model_name>.created/updated/deleted, source.replaced/updated
+	payload = models.JSONField()
+	created_at = models.DateTimeField(db_default=Now())
+
+	def __str__(self) -> str:
+		return f'{self.event} #{self.pk}'
+
+
+class PersonIdentity(models.Model):
+	"""
+	One row per national code, merged across banks. Maintained by the importer
+	(see people.identity); rebuild with ``manage.py rebuild_identities``.
+	"""
+	national_code = ZeroPaddedDigitsField(digits=10, primary_key=True)
+	# Best-known values: the most recently imported non-empty one
+	first_name = models.CharField(max_length=150, blank=True)
+	last_name = models.CharField(max_length=150, blank=True, null=True)
+	birthdate = models.DateField(null=True, blank=True)
+	sources = ArrayField(models.CharField(max_length=32, choices=Source.choices), default=list)
+	source_count = models.PositiveSmallIntegerField(default=0)
+	card_count = models.PositiveIntegerField(default=0)
+	phone_count = models.PositiveIntegerField(default=0)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	class Meta:
+		indexes = [
+			# ?source=MELLI is sources @> ARRAY['MELLI']
+			GinIndex(fields=['sources'], name='idx_identity_sources'),
+			models.Index(fields=['source_count'], name='idx_identity_source_count'),
+		]
+
+	def __str__(self) -> str:
+		return self.national_code
+
+
 class ImportJobStatus(models.TextChoices):
     PENDING = 'PENDING', 'Pending'
+    # Dry run passed; waits for someone to start the import
+    CHECKED = 'CHECKED', 'Checked'
+    # Dry run found the file unfit; nothing was published
+    REJECTED = 'REJECTED', 'Rejected'
     PROCESSING = 'PROCESSING', 'Processing'
     COMPLETED = 'COMPLETED', 'Completed'
     FAILED = 'FAILED', 'Failed'
 
 
+class ImportMode(models.TextChoices):
+    # Upsert rows into the live tables
+    MERGE = 'MERGE', 'Merge'
+    # Load a detached copy of the source's partitions and swap it in at the end
+    REPLACE = 'REPLACE', 'Replace'
+
+
+class ImportReader(models.TextChoices):
+    # pandas C parser, one Python object per cell
+    PANDAS = 'PANDAS', 'pandas'
+    # Multithreaded pyarrow.csv streaming reader (optional dependency)
+    ARROW = 'ARROW', 'pyarrow'
+
+
 class ImportJob(models.Model):
     source = models.CharField(max_length=32, choices=Source.choices)
     file_path = models.CharField(max_length=500)
+    mode = models.CharField(max_length=16, choices=ImportMode.choices, default=ImportMode.MERGE)
+    # CSV parser used by import_chunks; Excel files always go through openpyxl
+    reader = models.CharField(max_length=16, choices=ImportReader.choices, default=ImportReader.PANDAS)
     status = models.CharField(
         max_length=20, 
         choices=ImportJobStatus.choices, 
@@ -103,6 +226,11 @@ class ImportJob(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     error_message = models.TextField(blank=True, null=True)
+    # Bulk load (MERGE only): drop people.indexes.DEFERRABLE_INDEXES while
+    # the chunks are written and rebuild them concurrently at the end
+    defer_indexes = models.BooleanField(default=False)
+    # people.preflight report from the dry run, if one was requested
+    preflight = models.JSONField(blank=True, null=True)
 
     def progress_percentage(self):
         if self.total_chunks > 0:
@@ -0,0 +1,49 @@
+import re
+import unicodedata
+
+# Arabic code points banks use interchangeably with the Persian ones, plus
+# hamza/madda variants that should not stop a name from matching.
+_CHAR_FOLDS = {
+    'ي': 'ی',  # ARABIC YEH
+    'ى': 'ی',  # ALEF MAKSURA
+    'ئ': 'ی',
+    'ك': 'ک',  # ARABIC KAF
+    'ة': 'ه',
+    'ۀ': 'ه',
+    'أ': 'ا',
+    'إ': 'ا',
+    'آ': 'ا',
+    'ٱ': 'ا',
+    'ؤ': 'و',
+}
+# Persian and Arabic-Indic digits -> ASCII
+_CHAR_FOLDS.update({chr(0x06F0 + i): str(i) for i in range(10)})
+_CHAR_FOLDS.update({chr(0x0660 + i): str(i) for i in range(10)})
+
+# Harakat, superscript alef, tatweel and invisible joiners/marks are dropped
+_STRIPPED = [chr(c) for c in range(0x064B, 0x0660)] + [
+    '\u0670',  # SUPERSCRIPT ALEF
+    '\u0640',  # TATWEEL
+    '\u200c',  # ZWNJ
+    '\u200d',  # ZWJ
+    '\u200e',  # LRM
+    '\u200f',  # RLM
+    '\ufeff',  # BOM
+]
+
+_SEARCH_TABLE = str.maketrans({**_CHAR_FOLDS, **{ch: None for ch in _STRIPPED}})
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_search_text(*parts) -> str:
+    """Fold name parts into the form stored in ``Person.search_name``.
+
+    Whitespace is removed entirely so "علی رضا", "علی‌رضا" and "علیرضا" all
+    compare equal; search terms must go through the same function.
+    """
+    text = ' '.join(str(part) for part in parts if part)
+    if not text:
+        return ''
+    # NFKC maps Arabic presentation forms (U+FB50..U+FEFF) back to base letters
+    text = unicodedata.normalize('NFKC', text).translate(_SEARCH_TABLE)
+    return _WHITESPACE_RE.sub('', text).casefold()
@@ -0,0 +1,98 @@
+import json
+import os
+from itertools import groupby
+import pika
+from django.db import connection, transaction
+from . import metrics
+from .fields import ZeroPaddedDigitsField
+from .models import CreditCard, OutboxEvent, Person, PhoneNumber
+
+# Push feed of person, card and phone number changes. Triggers (migration
+# 0015) queue an OutboxEvent in the transaction that made the change; the
+# relay publishes them to the EXCHANGE topic exchange and deletes them in one
+# transaction that only commits after the broker confirmed every message.
+# A crash in between publishes the batch again, so delivery is at least once:
+# consumers drop events whose id they have already handled.
+#
+# Routing keys are the event names (person.created, creditcard.deleted, ...);
+# bind 'person.*' or '#'. Each message carries a run of consecutive events of
+# one name, in outbox order. source.replaced means a REPLACE import swapped
+# in the whole source, whose rows come with no events of their own.
+# source.updated stands for one bulk write (a chunk of a MERGE import), also
+# without row events: fetch its rows from the ?since= changes endpoints, from
+# its version on.
+
+EXCHANGE = 'people.changes'
+BATCH_SIZE = 500
+
+_MODELS = {model._meta.model_name: model for model in (Person, CreditCard, PhoneNumber)}
+
+# Transaction-local setting the triggers check (migration 0018)
+BULK_SETTING = 'people.outbox_bulk'
+
+
+def record_bulk_write(source, **details):
+    """Queue one source.updated event for the current transaction and switch its row events off.
+
+    Call inside the writing transaction, before its writes. The event's
+    version is the transaction's, which every row it writes is stamped with.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT set_config(%s, 'on', true), pg_current_xact_id()::text::bigint", [BULK_SETTING])
+        version = cursor.fetchone()[1]
+    OutboxEvent.objects.create(event='source.updated', payload={'source': source, 'version': version, **details})
+
+
+def connect():
+    credentials = pika.PlainCredentials(
+        os.environ.get('RABBITMQ_DEFAULT_USER', 'guest'),
+        os.environ.get('RABBITMQ_DEFAULT_PASS', 'guest')
+    )
+    parameters = pika.ConnectionParameters(
+        host=os.environ.get('RABBITMQ_HOST', 'rabbitmq'),
+        port=int(os.environ.get('RABBITMQ_PORT', 5672)),
+        credentials=credentials
+    )
+    connection = pika.BlockingConnection(parameters)
+    channel = connection.channel()
+    channel.exchange_declare(exchange=EXCHANGE, exchange_type='topic', durable=True)
+    # basic_publish now waits for the broker's ack and raises on a nack
+    channel.confirm_delivery()
+    return connection, channel
+
+
+def relay_batch(channel, batch_size=BATCH_SIZE) -> int:
+    """Publish and delete up to ``batch_size`` of the oldest events; returns how many."""
+    with transaction.atomic():
+        # SKIP LOCKED lets a second relay take the next batch instead of waiting
+        events = list(OutboxEvent.objects.select_for_update(skip_locked=True).order_by('id')[:batch_size])
+        if not events:
+            return 0
+        for name, run in groupby(events, key=lambda event: event.event):
+            run = list(run)
+            body = json.dumps({'events': [_message(event) for event in run]}, ensure_ascii=False)
+            channel.basic_publish(
+                exchange=EXCHANGE,
+                routing_key=name,
+                body=body,
+                properties=pika.BasicProperties(
+                    delivery_mode=2,  # make message persistent
+                    content_type='application/json',
+                    message_id=f'{run[0].id}-{run[-1].id}',
+                )
+            )
+            metrics.OUTBOX_EVENTS_PUBLISHED.labels(event=name).inc(len(run))
+        OutboxEvent.objects.filter(id__in=[event.id for event in events]).delete()
+    return len(events)
+
+
+def _message(event):
+    payload = event.payload
+    model = _MODELS.get(event.event.partition('.')[0])
+    if model is not None:
+        # to_jsonb() gives the stored integers; send the padded strings the API shows
+        payload = dict(payload)
+        for field in model._meta.concrete_fields:
+            if isinstance(field, ZeroPaddedDigitsField) and payload.get(field.attname) is not None:
+                payload[field.attname] = field.to_python(payload[field.attname])
+    return {'id': event.id, 'event': event.event, 'at': event.created_at.isoformat(), 'data': payload}
@@ -0,0 +1,280 @@
+import re
+from django.db import connection, transaction
+from .models import CreditCard, OutboxEvent, Person, PhoneNumber, Tombstone
+from .normalization import normalize_search_text
+
+# people_person, people_creditcard and people_phonenumber are LIST-partitioned
+# by source (see migration 0008). Each Source value has its own partition,
+# named <table>_<source>, plus a <table>_default catch-all.
+#
+# REPLACE imports load into standalone staging tables named
+# <table>_<source>_j<job id>, which swap_in() attaches in place of the live
+# partitions in a single transaction.
+#
+# The cards' and phones' (person_id, source) foreign keys are declared
+# partition to partition (<table>_<source> -> people_person_<source>, see
+# migration 0017), not on the parent tables: ATTACH PARTITION would otherwise
+# validate a whole bank's cards and phones while the swap holds its locks. A
+# source added later needs create_partitions() for all three tables, then
+# link_partitions().
+
+# Parent first: children reference person (id, source)
+PARTITIONED_MODELS = (Person, CreditCard, PhoneNumber)
+CHILD_MODELS = (CreditCard, PhoneNumber)
+
+FOREIGN_KEY_ACTIONS = 'ON UPDATE CASCADE ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED'
+
+# Waiting longer than this for the DETACH/ATTACH locks fails the swap rather
+# than queueing every reader behind it
+SWAP_LOCK_TIMEOUT = '10s'
+
+_INDEX_DEF = re.compile(r'^CREATE (UNIQUE )?INDEX \S+ ON (?:ONLY )?\S+ ')
+_SOURCE_VALUE = re.compile(r'^[A-Z0-9_]+$')
+
+
+def partition_name(table, source):
+    return f'{table}_{source.lower()}'
+
+
+def staging_name(table, source, job_id):
+    return f'{partition_name(table, source)}_j{job_id}'
+
+
+def create_partitions(cursor, table, sources):
+    """Create the per-source partitions and the default partition of ``table``."""
+    qn = connection.ops.quote_name
+    for source in sources:
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {qn(partition_name(table, source))} '
+            f'PARTITION OF {qn(table)} FOR VALUES IN ({_literal(source)})'
+        )
+    cursor.execute(f'CREATE TABLE IF NOT EXISTS {qn(table + "_default")} PARTITION OF {qn(table)} DEFAULT')
+
+
+def foreign_key_name(child_partition):
+    return f'{child_partition}_person_fk'
+
+
+def add_foreign_key(cursor, child_partition, person_partition, not_valid=False):
+    qn = connection.ops.quote_name
+    cursor.execute(
+        f'ALTER TABLE {qn(child_partition)} ADD CONSTRAINT {qn(foreign_key_name(child_partition))} '
+        f'FOREIGN KEY (person_id, source) REFERENCES {qn(person_partition)} (id, source) {FOREIGN_KEY_ACTIONS}'
+        + (' NOT VALID' if not_valid else '')
+    )
+
+
+def link_partitions(cursor):
+    """Add the missing card and phone -> person partition foreign keys; returns their names.
+
+    Each is added NOT VALID and then validated, which only takes locks that
+    let reads and writes go on.
+    """
+    qn = connection.ops.quote_name
+    person_table = Person._meta.db_table
+    added = []
+    for person_partition in _partitions(cursor, person_table):
+        suffix = person_partition[len(person_table):]
+        for model in CHILD_MODELS:
+            child = model._meta.db_table + suffix
+            name = foreign_key_name(child)
+            cursor.execute(
+                'SELECT to_regclass(%s) IS NOT NULL, EXISTS (SELECT 1 FROM pg_constraint WHERE conname = %s '
+                'AND conrelid = to_regclass(%s))',
+                [qn(child), name, qn(child)],
+            )
+            exists, linked = cursor.fetchone()
+            if not exists or linked:
+                continue
+            add_foreign_key(cursor, child, person_partition, not_valid=True)
+            cursor.execute(f'ALTER TABLE {qn(child)} VALIDATE CONSTRAINT {qn(name)}')
+            added.append(name)
+    return added
+
+
+def _partitions(cursor, table):
+    cursor.execute(
+        'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+        'WHERE i.inhparent = %s::regclass ORDER BY c.relname',
+        [table],
+    )
+    return [name for (name,) in cursor.fetchall()]
+
+
+def prepare_staging(source, job_id):
+    """(Re)create empty staging tables for a REPLACE import of ``source``.
+
+    Only the primary key and unique constraints are built up front, because
+    the loader upserts against them; the remaining indexes are built in one
+    pass by swap_in() once the data is in.
+    """
+    qn = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cursor:
+        for model in PARTITIONED_MODELS:
+            table = model._meta.db_table
+            staging = staging_name(table, source, job_id)
+            cursor.execute(f'DROP TABLE IF EXISTS {qn(staging)}')
+            # INCLUDING DEFAULTS keeps id drawing from the parent's sequence
+            cursor.execute(f'CREATE TABLE {qn(staging)} (LIKE {qn(table)} INCLUDING DEFAULTS)')
+            # Lets ATTACH PARTITION skip the scan that proves the partition bound
+            cursor.execute(
+                f'ALTER TABLE {qn(staging)} ADD CONSTRAINT {qn(staging + "_bound")} '
+                f'CHECK (source IS NOT NULL AND source = {_literal(source)})'
+            )
+            cursor.execute(
+                "SELECT pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = %s::regclass AND contype IN ('p', 'u') ORDER BY conname",
+                [table],
+            )
+            for i, (definition,) in enumerate(cursor.fetchall()):
+                cursor.execute(f'ALTER TABLE {qn(staging)} ADD CONSTRAINT {qn(f"{staging}_c{i}")} {definition}')
+
+
+def drop_staging(source, job_id):
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for model in reversed(PARTITIONED_MODELS):
+            cursor.execute(f'DROP TABLE IF EXISTS {qn(staging_name(model._meta.db_table, source, job_id))}')
+
+
+def write_staging_rows(records, source, job_id) -> tuple[int, int]:
+    """Upsert normalized records into the job's staging tables; returns (inserted, updated).
+
+    Same semantics as tasks.write_rows: the last row for a national code wins,
+    cards move to the last person seen with them, phone numbers accumulate.
+    """
+    people = {}
+    cards = {}
+    phones = set()
+    for record in records:
+        people[record['national_code']] = record
+        if record['card_number']:
+            cards[record['card_number']] = record['national_code']
+        for number in record['mobiles']:
+            phones.add((record['national_code'], number))
+    if not people:
+        return 0, 0
+
+    qn = connection.ops.quote_name
+    person_table = qn(staging_name(Person._meta.db_table, source, job_id))
+    card_table = qn(staging_name(CreditCard._meta.db_table, source, job_id))
+    phone_table = qn(staging_name(PhoneNumber._meta.db_table, source, job_id))
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Sorted keys keep concurrent workers taking row locks in the same order
+        rows = [
+            (
+                code,
+                record['first_name'],
+                record['last_name'],
+                record['birthdate'],
+                source,
+                normalize_search_text(record['first_name'], record['last_name']),
+            )
+            for code, record in sorted(people.items())
+        ]
+        cursor.execute(
+            f'INSERT INTO {person_table} (national_code, first_name, last_name, birthdate, source, search_name) '
+            f'VALUES {_placeholders(rows)} '
+            'ON CONFLICT (national_code, source) DO UPDATE SET '
+            'first_name = EXCLUDED.first_name, last_name = EXCLUDED.last_name, '
+            'birthdate = EXCLUDED.birthdate, search_name = EXCLUDED.search_name '
+            # xmax is 0 only for freshly inserted tuples
+            'RETURNING national_code, id, (xmax = 0)',
+            [value for row in rows for value in row],
+        )
+        # national_code comes back as the stored integer
+        ids = {}
+        inserted = 0
+        for code, person_id, created in cursor.fetchall():
+            ids[code] = person_id
+            inserted += 1 if created else 0
+
+        if cards:
+            rows = [(number, ids[int(code)], source) for number, code in sorted(cards.items())]
+            cursor.execute(
+                f'INSERT INTO {card_table} (card_number, person_id, source) VALUES {_placeholders(rows)} '
+                'ON CONFLICT (card_number, source) DO UPDATE SET person_id = EXCLUDED.person_id',
+                [value for row in rows for value in row],
+            )
+        if phones:
+            rows = sorted((number, ids[int(code)], source) for code, number in phones)
+            cursor.execute(
+                f'INSERT INTO {phone_table} (number, person_id, source) VALUES {_placeholders(rows)} '
+                'ON CONFLICT (number, person_id, source) DO NOTHING',
+                [value for row in rows for value in row],
+            )
+    return inserted, len(people) - inserted
+
+
+def swap_in(source, job_id):
+    """Replace the live partitions of ``source`` with the job's staging tables.
+
+    Secondary indexes are built, the staging cards' and phones' foreign keys
+    to the staging persons validated and statistics gathered before any live
+    table is touched. The swap itself runs in one transaction, so readers see
+    either the old or the new data: the old partitions are detached and
+    dropped (children first) and the staging tables are attached and renamed
+    into place. The parent tables carry no foreign keys, so nothing is
+    validated while it holds its locks: the lock window is catalog work only.
+    Dropped partitions fire no delete triggers, so the swap leaves source-wide
+    tombstones and a source.replaced outbox event telling readers to download
+    the source again.
+    """
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for model in PARTITIONED_MODELS:
+            table = model._meta.db_table
+            staging = staging_name(table, source, job_id)
+            # Matching indexes on the staging table are adopted by ATTACH
+            # instead of being built while it holds its locks
+            cursor.execute(
+                'SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i '
+                'WHERE i.indrelid = %s::regclass AND NOT EXISTS ('
+                "SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid AND c.conrelid = i.indrelid "
+                "AND c.contype IN ('p', 'u', 'x')) "
+                'ORDER BY i.indexrelid',
+                [table],
+            )
+            for i, (definition,) in enumerate(cursor.fetchall()):
+                cursor.execute(_INDEX_DEF.sub(
+                    lambda m: f'CREATE {m.group(1) or ""}INDEX {qn(f"{staging}_i{i}")} ON {qn(staging)} ',
+                    definition,
+                ))
+            if model in CHILD_MODELS:
+                # One validating scan of the staging table, before the swap
+                add_foreign_key(cursor, staging, staging_name(Person._meta.db_table, source, job_id))
+            cursor.execute(f'ANALYZE {qn(staging)}')
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'")
+        for model in reversed(PARTITIONED_MODELS):
+            table = model._meta.db_table
+            live = partition_name(table, source)
+            cursor.execute('SELECT to_regclass(%s)', [live])
+            if cursor.fetchone()[0] is not None:
+                cursor.execute(f'ALTER TABLE {qn(table)} DETACH PARTITION {qn(live)}')
+                cursor.execute(f'DROP TABLE {qn(live)}')
+        for model in PARTITIONED_MODELS:
+            table = model._meta.db_table
+            staging = staging_name(table, source, job_id)
+            cursor.execute(
+                f'ALTER TABLE {qn(table)} ATTACH PARTITION {qn(staging)} FOR VALUES IN ({_literal(source)})'
+            )
+            cursor.execute(f'ALTER TABLE {qn(staging)} RENAME TO {qn(partition_name(table, source))}')
+        Tombstone.objects.bulk_create(
+            [Tombstone(resource=model._meta.model_name, source=source) for model in PARTITIONED_MODELS]
+        )
+        OutboxEvent.objects.create(event='source.replaced', payload={'source': source, 'import_job': job_id})
+
+
+def _literal(source):
+    # Partition bounds and CHECKs are DDL, which cannot take bind parameters
+    if not _SOURCE_VALUE.match(source):
+        raise ValueError(f'Invalid source: {source!r}')
+    return f"'{source}'"
+
+
+def _placeholders(rows):
+    row = '(' + ', '.join(['%s'] * len(rows[0])) + ')'
+    return ', '.join([row] * len(rows))
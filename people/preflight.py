@@ -0,0 +1,276 @@
+import csv
+import io
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from .encoding import MOJIBAKE_RE, detect_encoding
+
+try:
+    import pyarrow  # noqa: F401
+    # Arrow-backed columns: the string checks run as Arrow compute kernels
+    STRING_DTYPE = 'string[pyarrow]'
+except ImportError:  # pyarrow is optional; object columns give the same counts, slower
+    STRING_DTYPE = str
+
+# Dry run of an import: profiles a bank file with vectorized pandas checks so
+# a bad file is refused before anything is published or written. CSV files
+# are cut into newline-aligned byte ranges scanned by worker processes.
+# Nothing here touches the database or Django models, so the spawned
+# workers only import pandas.
+
+COLUMNS = ['NATIONAL_CODE', 'CARD_NO', 'FULL_NAME', 'BIRTH_DATE', 'MOBILE']
+
+RANGE_BYTES = 32 * 1024 * 1024
+
+# rule -> what it counts. The first three are rows the importer drops or
+# cannot write; the rest are stored, but lossy or odd.
+RULES = {
+    'national_code_invalid': 'national code missing, not 0-9 digits or longer than 10 (row skipped)',
+    'card_too_long': 'card number longer than 16 digits (row skipped)',
+    'mobile_too_long': 'a mobile number longer than 15 digits (chunk write fails)',
+    'card_scientific': 'card number in scientific notation, trailing digits lost',
+    'birthdate_invalid': 'birth date present but not YYYY-MM-DD (stored empty)',
+    'mobile_invalid': 'a mobile number not shaped like 09XXXXXXXXX',
+    'name_missing': 'empty FULL_NAME',
+    'name_mojibake': 'double-encoded FULL_NAME (repaired on import)',
+    'malformed': 'line with more fields than the header (not parsed) or fewer (padded with empty values)',
+}
+
+# Defaults for refusing an import, as a share of data rows
+MAX_SKIPPED_RATE = 0.05
+MAX_MALFORMED_RATE = 0.01
+
+
+def scan_file(path, workers=None, max_bytes=None):
+    """Profile ``path`` and return the report dict.
+
+    ``max_bytes`` scans only the beginning of a CSV file; row counts and
+    rates are then extrapolated and ``sampled`` is set.
+    """
+    _, ext = os.path.splitext(path.lower())
+    if ext in ['.xlsx', '.xlsm']:
+        df = pd.read_excel(path, dtype=str, keep_default_na=False, engine='openpyxl').astype(STRING_DTYPE)
+        columns = _column_mapping([str(name) for name in df.columns])
+        counts, codes, cards = _profile(df)
+        report = {'file': path, 'format': 'xlsx', 'columns': columns, 'sampled': False}
+        return _finish(report, counts, [codes], [cards], scale=1)
+    if ext not in ['.csv', '.txt']:
+        raise ValueError('Unsupported file extension. Use .csv or .xlsx')
+
+    file_encoding = detect_encoding(path)
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header_line = f.readline()
+        data_start = f.tell()
+        ranges = _ranges(f, data_start, size if max_bytes is None else min(size, data_start + max_bytes), workers)
+    header_text = header_line.decode(file_encoding.encoding, errors='replace')
+    delimiter = _sniff_delimiter(header_text)
+    header = next(csv.reader([header_text], delimiter=delimiter), [])
+    columns = _column_mapping(header)
+    columns['delimiter'] = delimiter
+
+    report = {
+        'file': path,
+        'format': 'csv',
+        'file_bytes': size,
+        'encoding': file_encoding.encoding,
+        'repair_mojibake': file_encoding.repair_mojibake,
+        'columns': columns,
+    }
+    scanned = ranges[-1][1] - data_start if ranges else 0
+    report['scanned_bytes'] = scanned
+    report['sampled'] = scanned < size - data_start
+    if delimiter != ',' or not ranges or len(columns['missing']) == len(COLUMNS):
+        # The importer only reads comma-separated files with these headers
+        return _finish(report, {'rows': 0}, [], [], scale=1)
+
+    jobs = [(path, start, end, file_encoding.encoding, header_line) for start, end in ranges]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) == 1:
+        results = [_scan_range(*job) for job in jobs]
+    else:
+        # spawn, not fork: the caller may be a threaded web process
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=context) as pool:
+            results = list(pool.map(_scan_range, *zip(*jobs)))
+
+    counts = {}
+    for result, _, _ in results:
+        for key, value in result.items():
+            counts[key] = counts.get(key, 0) + value
+    scale = (size - data_start) / scanned if scanned else 1
+    return _finish(report, counts, [codes for _, codes, _ in results], [cards for _, _, cards in results], scale)
+
+
+def verdict(report, max_skipped_rate=MAX_SKIPPED_RATE, max_malformed_rate=MAX_MALFORMED_RATE):
+    """Reasons to refuse the import described by ``report``; empty when it may go ahead."""
+    reasons = []
+    columns = report['columns']
+    if columns.get('delimiter', ',') != ',':
+        reasons.append(f"delimiter is {columns['delimiter']!r}, the importer expects ','")
+    if 'NATIONAL_CODE' in columns['missing']:
+        reasons.append('no NATIONAL_CODE column; every row would be skipped')
+    if not report['rows_scanned']:
+        reasons.append('no data rows')
+        return reasons
+    rates = report['rates']
+    if rates['skipped'] > max_skipped_rate:
+        reasons.append(f"{rates['skipped']:.1%} of rows would be skipped (limit {max_skipped_rate:.0%})")
+    if rates['malformed'] > max_malformed_rate:
+        reasons.append(f"{rates['malformed']:.1%} of lines are malformed (limit {max_malformed_rate:.0%})")
+    if report['rules']['mobile_too_long']:
+        reasons.append(f"{report['rules']['mobile_too_long']} rows have mobile numbers the database cannot store")
+    return reasons
+
+
+def _sniff_delimiter(header_text):
+    try:
+        return csv.Sniffer().sniff(header_text, delimiters=',;\t|').delimiter
+    except csv.Error:
+        return ','
+
+
+def _column_mapping(header):
+    names = [name.strip().lstrip('﻿') for name in header]
+    return {
+        'header': names,
+        'mapping': {column: names.index(column) if column in names else None for column in COLUMNS},
+        'missing': [column for column in COLUMNS if column not in names],
+        'ignored': [name for name in names if name not in COLUMNS],
+    }
+
+
+def _ranges(f, start, end, workers):
+    """Newline-aligned byte ranges from ``start`` to the end of the line ``end`` falls in."""
+    size = os.fstat(f.fileno()).st_size
+    count = max(workers or os.cpu_count() or 1, math.ceil((end - start) / RANGE_BYTES))
+    step = max(math.ceil((end - start) / count), 1)
+    ranges = []
+    position = start
+    while position < end:
+        stop = _align(f, min(position + step, end), size)
+        ranges.append((position, stop))
+        position = stop
+    return ranges
+
+
+def _align(f, offset, size):
+    # First line start at or after offset
+    if offset >= size:
+        return size
+    f.seek(offset - 1)
+    f.readline()
+    return f.tell()
+
+
+def _scan_range(path, start, end, encoding, header_line):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    # Parsed under the file's own header, as the importer does; usecols would
+    # let lines with extra fields through. Those lines are skipped, short ones
+    # padded with empty values
+    df = pd.read_csv(
+        io.BytesIO(header_line + data),
+        header=0,
+        dtype=STRING_DTYPE,
+        keep_default_na=False,
+        encoding=encoding,
+        encoding_errors='replace',
+        on_bad_lines='skip',
+    )
+    width = len(df.columns)
+    df.columns = [str(name).strip().lstrip('﻿') for name in df.columns]
+    counts, codes, cards = _profile(df[[name for name in df.columns if name in COLUMNS]])
+    # Padding leaves no trace in the frame, so field counts come from the csv
+    # module (a C loop; blank lines are not lines to pandas either)
+    counts['lines'] = counts['malformed'] = 0
+    for fields in csv.reader(io.TextIOWrapper(io.BytesIO(data), encoding, errors='replace', newline='')):
+        if fields:
+            counts['lines'] += 1
+            counts['malformed'] += len(fields) != width
+    return counts, codes, cards
+
+
+def _column(df, name):
+    if name in df:
+        return df[name].fillna('').str.strip()
+    return pd.Series('', index=df.index, dtype=STRING_DTYPE)
+
+
+def _profile(df):
+    """Rule counts for one block of rows, plus its valid national codes and cards as int64."""
+    code = _column(df, 'NATIONAL_CODE')
+    card = _column(df, 'CARD_NO')
+    name = _column(df, 'FULL_NAME')
+    birth = _column(df, 'BIRTH_DATE')
+    mobile = _column(df, 'MOBILE')
+
+    code_ok = code.str.fullmatch(r'[0-9]{1,10}')
+    scientific = card.str.contains('[eE]', regex=True)
+    card_digits = card.str.replace(r'\D', '', regex=True)
+    card_too_long = ~scientific & (card_digits.str.len() > 16)
+
+    # Whole-column regexes only: extract/split would fall back to Python loops
+    birthdate_invalid = (birth != '') & ~birth.str.fullmatch(
+        r'[0-9]{4}[-/](0?[1-9]|1[0-2])[-/](0?[1-9]|[12][0-9]|3[01])'
+    )
+
+    # parse_mobiles keeps the digits of each '|'-separated part and adds a
+    # leading 0 where missing
+    numbers = mobile.str.replace(r'[^0-9|]', '', regex=True)
+    has_numbers = numbers.str.contains('[0-9]', regex=True)
+    mobile_invalid = has_numbers & ~numbers.str.fullmatch(r'\|*(0?9[0-9]{9}\|+)*0?9[0-9]{9}\|*')
+    mobile_too_long = numbers.str.contains(r'(?:^|\|)(?:0[0-9]{15}|[1-9][0-9]{14})', regex=True)
+
+    skipped = ~code_ok | card_too_long
+    kept = ~skipped
+    counts = {
+        'rows': len(df),
+        'skipped': int(skipped.sum()),
+        'national_code_invalid': int((~code_ok).sum()),
+        'card_too_long': int(card_too_long.sum()),
+        'mobile_too_long': int(mobile_too_long.sum()),
+        'card_scientific': int(scientific.sum()),
+        'birthdate_invalid': int(birthdate_invalid.sum()),
+        'mobile_invalid': int(mobile_invalid.sum()),
+        'name_missing': int((name == '').sum()),
+        'name_mojibake': int(name.str.contains(MOJIBAKE_RE.pattern, regex=True).sum()),
+        'card_missing': int((kept & (card_digits == '')).sum()),
+    }
+    codes = code[kept].astype(np.int64).to_numpy()
+    cards = card_digits[kept & ~scientific & (card_digits != '')].astype(np.int64).to_numpy()
+    return counts, codes, cards
+
+
+def _finish(report, counts, codes, cards, scale):
+    rows = counts.get('rows', 0)
+    lines = counts.get('lines', rows)
+    codes = np.concatenate(codes) if codes else np.empty(0, np.int64)
+    cards = np.concatenate(cards) if cards else np.empty(0, np.int64)
+    unique_codes = len(np.unique(codes))
+    unique_cards = len(np.unique(cards))
+
+    report['rows_scanned'] = rows
+    report['estimated_rows'] = round(rows * scale)
+    report['rules'] = {rule: counts.get(rule, 0) for rule in RULES}
+    report['rates'] = {
+        'skipped': round(counts.get('skipped', 0) / rows, 4) if rows else 0,
+        'malformed': round(counts.get('malformed', 0) / lines, 4) if lines else 0,
+        **{rule: round(counts.get(rule, 0) / rows, 4) if rows else 0 for rule in RULES if rule != 'malformed'},
+        'card_missing': round(counts.get('card_missing', 0) / rows, 4) if rows else 0,
+    }
+    # Repeated national codes are expected (one row per card); repeated
+    # cards usually mean the file was concatenated with itself
+    report['duplicates'] = {
+        'national_codes_unique': unique_codes,
+        'national_code_repeat_rate': round(1 - unique_codes / len(codes), 4) if len(codes) else 0,
+        'cards_unique': unique_cards,
+        'card_repeat_rate': round(1 - unique_cards / len(cards), 4) if len(cards) else 0,
+    }
+    report['reasons'] = verdict(report)
+    report['accepted'] = not report['reasons']
+    return report
@@ -0,0 +1,143 @@
+import logging
+import pandas as pd
+from .encoding import MOJIBAKE_RE, fix_mojibake, fix_mojibake_column
+from .models import ImportReader
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from pyarrow import csv as pa_csv
+except ImportError:  # pyarrow is optional; only the ARROW reader needs it
+    pa = None
+
+# CSV chunk readers for the importers. Both backends yield lists of row dicts
+# keyed by COLUMNS, with FULL_NAME already repaired when the file needs it,
+# and exactly ``chunk_size`` rows per chunk except the last one.
+#
+# Malformed lines (people.preflight counts them) never fail the file halfway
+# through its chunks. pandas pads a short line with empty values and keeps a
+# long one when picking columns by name, skipping it by position; Arrow can
+# do neither and skips both.
+
+COLUMNS = ['NATIONAL_CODE', 'CARD_NO', 'FULL_NAME', 'BIRTH_DATE', 'MOBILE']
+
+logger = logging.getLogger(__name__)
+
+# Bytes each Arrow parse block covers; blocks are parsed on the CPU pool
+ARROW_BLOCK_BYTES = 8 * 1024 * 1024
+
+
+def arrow_available():
+    return pa is not None
+
+
+def read_csv_chunks(path, chunk_size, file_encoding, reader=ImportReader.PANDAS, by_position=False, header=True):
+    """Yield the file's rows in chunks of ``chunk_size`` row dicts.
+
+    By default columns are picked by header name and other columns are not
+    parsed at all. ``by_position`` takes the first five columns whatever
+    they are called (the Melli layout), with or without a ``header`` row.
+    """
+    if reader == ImportReader.ARROW:
+        if not arrow_available():
+            raise ValueError('The pyarrow reader needs the pyarrow package installed')
+        return _arrow_chunks(path, chunk_size, file_encoding, by_position, header)
+    return _pandas_chunks(path, chunk_size, file_encoding, by_position, header)
+
+
+def _pandas_chunks(path, chunk_size, file_encoding, by_position, header):
+    for chunk in pd.read_csv(
+        path,
+        chunksize=chunk_size,
+        header=0 if header else None,
+        usecols=None if by_position else (lambda column: column in COLUMNS),
+        dtype=str,
+        keep_default_na=False,
+        encoding=file_encoding.encoding,
+        # Undecodable bytes show up as U+FFFD instead of vanishing
+        encoding_errors='replace',
+        on_bad_lines='skip',
+    ):
+        if by_position:
+            chunk = chunk.iloc[:, :len(COLUMNS)]
+            chunk.columns = COLUMNS[:chunk.shape[1]]
+        if file_encoding.repair_mojibake and 'FULL_NAME' in chunk:
+            chunk['FULL_NAME'] = fix_mojibake_column(chunk['FULL_NAME'])
+        yield chunk.to_dict(orient='records')
+
+
+def _arrow_chunks(path, chunk_size, file_encoding, by_position, header):
+    names = [f'f{i}' for i in range(len(COLUMNS))] if by_position else COLUMNS
+    read_options = pa_csv.ReadOptions(
+        use_threads=True,
+        block_size=ARROW_BLOCK_BYTES,
+        # Arrow decodes UTF-8 natively and skips a BOM itself; anything else
+        # is transcoded on a background thread
+        encoding='utf8' if file_encoding.encoding.startswith('utf-8') else file_encoding.encoding,
+        autogenerate_column_names=by_position,
+        skip_rows=1 if by_position and header else 0,
+    )
+    convert_options = pa_csv.ConvertOptions(
+        column_types={name: pa.string() for name in names},
+        include_columns=names,
+        include_missing_columns=True,
+        strings_can_be_null=False,
+        quoted_strings_can_be_null=False,
+        # Checked per chunk in _replace_invalid_utf8 instead of failing the file
+        check_utf8=False,
+    )
+    skipped = []
+    parse_options = pa_csv.ParseOptions(invalid_row_handler=lambda row: skipped.append(row.number) or 'skip')
+    stream = pa_csv.open_csv(
+        path, read_options=read_options, parse_options=parse_options, convert_options=convert_options
+    )
+
+    pending = []
+    pending_rows = 0
+    for batch in stream:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        if pending_rows < chunk_size:
+            continue
+        table = pa.Table.from_batches(pending)
+        offset = 0
+        while pending_rows - offset >= chunk_size:
+            yield _arrow_records(table.slice(offset, chunk_size), file_encoding)
+            offset += chunk_size
+        pending = table.slice(offset).to_batches()
+        pending_rows -= offset
+    if pending_rows:
+        yield _arrow_records(pa.Table.from_batches(pending), file_encoding)
+    if skipped:
+        logger.warning('%s: skipped %d malformed line(s)', path, len(skipped))
+
+
+def _arrow_records(table, file_encoding):
+    # Cells stay in Arrow buffers up to here; Python strings are only made
+    # for the rows being published
+    table = _replace_invalid_utf8(table.rename_columns(COLUMNS))
+    if file_encoding.repair_mojibake:
+        names = table.column('FULL_NAME')
+        # RE2 pre-check over the whole column without leaving Arrow
+        mask = pc.match_substring_regex(names, MOJIBAKE_RE.pattern)
+        if pc.any(mask).as_py():
+            repaired = [
+                fix_mojibake(name) if affected else name
+                for name, affected in zip(names.to_pylist(), mask.to_pylist())
+            ]
+            table = table.set_column(COLUMNS.index('FULL_NAME'), 'FULL_NAME', pa.array(repaired, pa.string()))
+    return table.to_pylist()
+
+
+def _replace_invalid_utf8(table):
+    """Decode columns holding invalid UTF-8 with U+FFFD, as the pandas reader does."""
+    for i, column in enumerate(table.columns):
+        try:
+            column.validate(full=True)
+        except pa.ArrowInvalid:
+            values = [
+                None if value is None else value.decode('utf-8', errors='replace')
+                for value in column.cast(pa.binary()).to_pylist()
+            ]
+            table = table.set_column(i, table.column_names[i], pa.array(values, pa.string()))
+    return table
@@ -1,28 +1,96 @@
+import functools
 from rest_framework import serializers
-from .models import Person, CreditCard, PhoneNumber, Source
+from .models import Person, CreditCard, PhoneNumber, PersonIdentity, Source
 
 
 class PersonSerializer(serializers.ModelSerializer):
+	# Stored as bigint; declared as text so leading zeros survive the round trip
+	national_code = serializers.RegexField(r'^\d{10}$', max_length=10)
 	source = serializers.ChoiceField(choices=Source.choices, default=Source.UNKNOWN)
 
 	class Meta:
 		model = Person
-		fields = ['id', 'national_code', 'first_name', 'last_name', 'birthdate', 'source']
+		fields = ['id', 'national_code', 'first_name', 'last_name', 'birthdate', 'source', 'version', 'updated_at']
 
+	def validate_source(self, value):
+		# The source picks the partition the person's cards and phones are
+		# tied to (see people.partitions); moving it would orphan them
+		if self.instance is not None and value != self.instance.source:
+			raise serializers.ValidationError('The source of an existing person cannot be changed.')
+		return value
 
-class CreditCardSerializer(serializers.ModelSerializer):
+
+class PersonSourceMixin:
+	"""
+	Cards and phone numbers live in their person's source partition (the
+	database enforces (person_id, source) -> person (id, source)): ``source``
+	defaults to the person's, and a different one is a 400, not an
+	IntegrityError at commit.
+	"""
+
+	def run_validators(self, attrs):
+		# Before the unique-together validators, which need the source
+		person = attrs.get('person', getattr(self.instance, 'person', None))
+		if person is not None:
+			if 'source' not in attrs:
+				if 'person' in attrs or self.instance is None:
+					attrs['source'] = person.source
+			elif attrs['source'] != person.source:
+				raise serializers.ValidationError({'source': [f'Must match the person\'s source ({person.source}).']})
+		super().run_validators(attrs)
+
+
+class CreditCardSerializer(PersonSourceMixin, serializers.ModelSerializer):
+	card_number = serializers.RegexField(r'^\d{16}$', max_length=16)
 	person_id = serializers.PrimaryKeyRelatedField(source='person', queryset=Person.objects.all())
-	source = serializers.ChoiceField(choices=Source.choices, default=Source.UNKNOWN)
+	source = serializers.ChoiceField(choices=Source.choices, required=False)
 
 	class Meta:
 		model = CreditCard
-		fields = ['id', 'card_number', 'person_id', 'source']
+		fields = ['id', 'card_number', 'person_id', 'source', 'version', 'updated_at']
 
 
-class PhoneNumberSerializer(serializers.ModelSerializer):
+class PhoneNumberSerializer(PersonSourceMixin, serializers.ModelSerializer):
 	person_id = serializers.PrimaryKeyRelatedField(source='person', queryset=Person.objects.all())
-	source = serializers.ChoiceField(choices=Source.choices, default=Source.UNKNOWN)
+	source = serializers.ChoiceField(choices=Source.choices, required=False)
 
 	class Meta:
 		model = PhoneNumber
-		fields = ['number', 'person_id', 'source']
\ No newline at end of file
+		# id is part of the response since change tracking: ?since= replicas
+		# match it against the ids of deleted rows
+		fields = ['id', 'number', 'person_id', 'source', 'version', 'updated_at']
+
+
+class PersonIdentitySerializer(serializers.ModelSerializer):
+	national_code = serializers.RegexField(r'^\d{10}$', max_length=10)
+
+	class Meta:
+		model = PersonIdentity
+		fields = [
+			'national_code', 'first_name', 'last_name', 'birthdate', 'sources',
+			'source_count', 'card_count', 'phone_count', 'updated_at',
+		]
+		read_only_fields = fields
+
+
+def represent_datetimes(serializer_class, rows):
+	"""
+	Format the datetimes of ``.values()`` rows the way ``serializer_class``
+	does (in TIME_ZONE, per DATETIME_FORMAT), so fast paths that skip the
+	serializer render them like create/update do. Changes rows in place.
+	"""
+	fields = _datetime_fields(serializer_class)
+	if fields:
+		for row in rows:
+			for name, field in fields:
+				if row.get(name) is not None:
+					row[name] = field.to_representation(row[name])
+	return rows
+
+
+@functools.cache
+def _datetime_fields(serializer_class):
+	return [
+		(name, field) for name, field in serializer_class().fields.items()
+		if isinstance(field, serializers.DateTimeField)
+	]
@@ -0,0 +1,111 @@
+import csv
+import random
+from datetime import date, timedelta
+import pandas as pd
+
+# Synthetic Melli-style bank dumps for benchmarks and load tests. Rows use the
+# importer's column names and reproduce the quirks seen in real files.
+
+COLUMNS = ['NATIONAL_CODE', 'CARD_NO', 'FULL_NAME', 'BIRTH_DATE', 'MOBILE']
+
+FIRST_NAMES = [
+    'علی', 'محمد', 'حسین', 'رضا', 'مهدی', 'غلامحسین', 'فاطمه', 'زهرا', 'مریم', 'سارا',
+    'امیر', 'حمید', 'نرگس', 'عبدالله', 'کریم', 'یاسمن', 'کیوان', 'پریسا', 'یوسف', 'سکینه',
+]
+LAST_NAMES = [
+    'محمدی', 'حسینی', 'احمدی', 'رضایی', 'کریمی', 'موسوی', 'جعفری', 'محمدزاده سیانی',
+    'کاظمی', 'نوری', 'یزدانی', 'قاسمی', 'صادقی', 'کیانی', 'شریفی', 'مرادی',
+]
+# Arabic code points some banks send instead of the Persian ones
+_ARABIC_VARIANTS = str.maketrans({'ی': 'ي', 'ک': 'ك'})
+
+# Multiplier coprime with 10**10, so i -> code is a bijection over 10-digit codes
+_CODE_STRIDE = 7_919_993
+
+
+def to_mojibake(text: str) -> str:
+    """UTF-8 bytes read back as Windows-1252 (the mojibake.txt case).
+
+    Bytes cp1252 leaves undefined (0x81, 0x8D, ...) come through as the
+    matching C1 control character, as they do in real dumps.
+    """
+    chars = []
+    for byte in text.encode('utf-8'):
+        try:
+            chars.append(bytes([byte]).decode('cp1252'))
+        except UnicodeDecodeError:
+            chars.append(chr(byte))
+    return ''.join(chars)
+
+
+def generate_rows(
+    count,
+    duplicate_rate=0.05,
+    scientific_rate=0.1,
+    mojibake_rate=0.2,
+    multi_phone_rate=0.3,
+    arabic_rate=0.2,
+    seed=0,
+    offset=0,
+):
+    """Yield ``count`` raw rows as dicts keyed by ``COLUMNS``.
+
+    ``offset`` shifts the generated identifiers so separate runs don't collide.
+    """
+    rng = random.Random(seed)
+    epoch = date(1940, 1, 1)
+    previous = []
+    for i in range(offset, offset + count):
+        if previous and rng.random() < duplicate_rate:
+            # Same person again, possibly with a different phone list
+            row = dict(rng.choice(previous))
+            row['MOBILE'] = _mobiles(rng, multi_phone_rate)
+            yield row
+            continue
+
+        national_code = f'{(i * _CODE_STRIDE) % 10 ** 10:010d}'
+        card = f'603799{(i * _CODE_STRIDE) % 10 ** 10:010d}'
+        if rng.random() < scientific_rate:
+            # What Excel leaves behind after touching the CSV: 6.03799E+15
+            card = f'{int(card):.5E}'
+
+        name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+        if rng.random() < arabic_rate:
+            name = name.translate(_ARABIC_VARIANTS)
+        if rng.random() < mojibake_rate:
+            name = to_mojibake(name)
+
+        birthdate = epoch + timedelta(days=rng.randrange(0, 65 * 365))
+        separator = '/' if rng.random() < 0.5 else '-'
+
+        row = {
+            'NATIONAL_CODE': national_code,
+            'CARD_NO': card,
+            'FULL_NAME': name,
+            'BIRTH_DATE': birthdate.strftime(f'%Y{separator}%m{separator}%d'),
+            'MOBILE': _mobiles(rng, multi_phone_rate),
+        }
+        if len(previous) < 10000:
+            previous.append(row)
+        yield row
+
+
+def _mobiles(rng, multi_phone_rate):
+    count = rng.randint(2, 3) if rng.random() < multi_phone_rate else 1
+    numbers = []
+    for _ in range(count):
+        number = f'9{rng.randrange(10 ** 9):09d}'
+        # Some banks keep the leading zero, some drop it
+        numbers.append('0' + number if rng.random() < 0.5 else number)
+    return '|'.join(numbers)
+
+
+def write_dump(path, rows):
+    """Write rows to ``path`` as CSV or XLSX depending on the extension."""
+    if str(path).lower().endswith(('.xlsx', '.xlsm')):
+        pd.DataFrame(list(rows), columns=COLUMNS).to_excel(path, index=False, engine='openpyxl')
+        return
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
@@ -1,8 +1,11 @@
 import pika
 import json
 import os
-from django.db import transaction
-from .models import Person, CreditCard, PhoneNumber, ImportJob, ImportJobStatus
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from .models import Person, CreditCard, PhoneNumber, ImportJob, ImportJobStatus, ImportMode
+from . import identity, indexes, metrics, outbox, partitions
+from .encoding import fix_mojibake
 from datetime import datetime
 import pandas as pd
 import math
@@ -18,90 +21,203 @@ def _normalize_card(card_raw: str) -> str:
     value = ''.join(ch for ch in value if ch.isdigit())
     return value
 
-def _fix_mojibake_text(value: str) -> str:
-    if not value:
-        return value
-    try:
-        return value.encode('windows-1252').decode('utf-8')
-    except Exception:
-        return value
+def parse_mobiles(mobile_raw: str) -> list[str]:
+    numbers = []
+    for mobile in mobile_raw.split('|'):
+        mobile = ''.join(ch for ch in mobile if ch.isdigit())
+        if mobile:
+            if mobile[0] != '0':
+                mobile = '0' + mobile
+            numbers.append(mobile)
+    return numbers
+
+def sync_phone_numbers(person, source, numbers, remove_missing=True) -> tuple[int, int]:
+    """Bring the person's phone numbers for ``source`` in line with ``numbers``.
+
+    Only the difference against the stored set is written: one bulk insert for
+    new numbers and, with ``remove_missing``, one delete for numbers no longer
+    listed. Returns ``(added, removed)``.
+    """
+    wanted = list(dict.fromkeys(numbers))
+    with transaction.atomic():
+        existing = set(
+            PhoneNumber.objects.filter(person=person, source=source).values_list('number', flat=True)
+        )
+        added = [number for number in wanted if number not in existing]
+        removed = existing.difference(wanted) if remove_missing else set()
+        if removed:
+            PhoneNumber.objects.filter(person=person, source=source, number__in=removed).delete()
+        if added:
+            PhoneNumber.objects.bulk_create(
+                [PhoneNumber(number=number, person=person, source=source) for number in added],
+                ignore_conflicts=True,
+            )
+    return len(added), len(removed)
+
+def normalize_row(row: dict, repair_mojibake: bool = True) -> dict | None:
+    """Clean one raw file row; returns None for rows that must be skipped.
+
+    ``repair_mojibake`` comes from the file's encoding detection
+    (people.encoding). import_chunks repairs whole name columns before
+    publishing and sends False; the per-row path covers older messages.
+    """
+    national_code = (row.get('NATIONAL_CODE') or '').strip()
+    card_number = _normalize_card(row.get('CARD_NO') or '')
+    if not national_code.isdigit() or len(national_code) > 10 or len(card_number) > 16:
+        return None
+
+    birthdate = None
+    birth_date_raw = (row.get('BIRTH_DATE') or '').strip()
+    if birth_date_raw:
+        date_val = str(birth_date_raw).replace('/', '-')
+        try:
+            birthdate = datetime.strptime(date_val, '%Y-%m-%d').date()
+        except Exception:
+            birthdate = None
+
+    full_name = (row.get('FULL_NAME') or '').strip()
+    if repair_mojibake:
+        full_name = fix_mojibake(full_name)
+
+    mobile_raw = (row.get('MOBILE') or '').strip()
+    return {
+        'national_code': national_code,
+        'first_name': full_name,
+        'last_name': None,
+        'birthdate': birthdate,
+        'card_number': card_number,
+        'mobiles': parse_mobiles(mobile_raw) if mobile_raw else [],
+    }
+
+def write_rows(records, source) -> tuple[int, int]:
+    """Upsert normalized records in one transaction; returns (inserted, updated)."""
+    inserted = 0
+    updated = 0
+    if not records:
+        return inserted, updated
+    with transaction.atomic():
+        # One source.updated event for the chunk instead of one per row written
+        outbox.record_bulk_write(source, rows=len(records))
+        for record in records:
+            person, created = Person.objects.update_or_create(
+                national_code=record['national_code'],
+                source=source,
+                defaults={
+                    'first_name': record['first_name'],
+                    'last_name': record['last_name'],
+                    'birthdate': record['birthdate'],
+                }
+            )
+            inserted += 1 if created else 0
+            updated += 0 if created else 1
+
+            if record['card_number']:
+                CreditCard.objects.update_or_create(
+                    card_number=record['card_number'],
+                    source=source,
+                    defaults={'person': person}
+                )
+
+            if record['mobiles']:
+                sync_phone_numbers(person, source, record['mobiles'], remove_missing=False)
+    return inserted, updated
+
+def finish_job(job):
+    """Swap in a REPLACE job's data or rebuild a bulk load's indexes, then mark the job COMPLETED.
+
+    Called once per job, by whichever of the publisher and the workers sees
+    every published chunk processed.
+    """
+    if job.mode == ImportMode.REPLACE:
+        with metrics.STAGE_SECONDS.labels(stage='swap').time():
+            partitions.swap_in(job.source, job.id)
+        with metrics.STAGE_SECONDS.labels(stage='identity').time():
+            identity.refresh_source(job.source)
+    elif job.defer_indexes:
+        with metrics.STAGE_SECONDS.labels(stage='reindex').time():
+            indexes.rebuild_deferrable_indexes()
+    ImportJob.objects.filter(id=job.id, status=ImportJobStatus.PROCESSING).update(
+        status=ImportJobStatus.COMPLETED, updated_at=timezone.now()
+    )
 
 def process_chunk(chunk_data):
     job = ImportJob.objects.get(id=chunk_data['job_id'])
+    source = chunk_data['source']
+    metrics.CHUNKS_IN_FLIGHT.inc()
     try:
         rows = chunk_data['rows']
-        source = chunk_data['source']
-        inserted = 0
-        updated = 0
-        
+        # Chunks queued before encoding detection existed carry no flag
+        repair_mojibake = chunk_data.get('repair_mojibake', True)
+
+        with metrics.STAGE_SECONDS.labels(stage='normalize').time():
+            records = [
+                record for record in (normalize_row(row, repair_mojibake) for row in rows)
+                if record is not None
+            ]
+        with metrics.STAGE_SECONDS.labels(stage='write').time():
+            if job.mode == ImportMode.REPLACE:
+                partitions.write_staging_rows(records, source, job.id)
+            else:
+                write_rows(records, source)
+        if job.mode == ImportMode.MERGE:
+            # REPLACE jobs refresh the whole source once the new data is live
+            with metrics.STAGE_SECONDS.labels(stage='identity').time():
+                identity.refresh_identities(record['national_code'] for record in records)
+
+        metrics.CHUNKS_PROCESSED.labels(source=source, status='ok').inc()
+        metrics.ROWS_WRITTEN.labels(source=source).inc(len(records))
+        metrics.ROWS_SKIPPED.labels(source=source).inc(len(rows) - len(records))
+
+        # Several workers finish chunks of the same job concurrently. The row
+        # lock serializes the increments, so exactly one worker sees the count
+        # reach total_chunks and finishes the job
         with transaction.atomic():
-            for row in rows:
-                national_code = row.get('NATIONAL_CODE', '').strip()
-                card_no_raw = row.get('CARD_NO', '')
-                full_name = _fix_mojibake_text(row.get('FULL_NAME', '').strip())
-                birth_date_raw = row.get('BIRTH_DATE', '').strip()
-                mobile_raw = row.get('MOBILE', '').strip()
-
-                first_name = full_name
-                last_name = None
-
-                birthdate = None
-                if birth_date_raw:
-                    date_val = str(birth_date_raw).replace('/', '-')
-                    try:
-                        birthdate = datetime.strptime(date_val, '%Y-%m-%d').date()
-                    except Exception:
-                        birthdate = None
-
-                card_number = _normalize_card(card_no_raw)
-
-                if not national_code or len(national_code) > 10 or len(card_number) > 16:
-                    continue
-
-                person, created = Person.objects.update_or_create(
-                    national_code=national_code,
-                    source=source,
-                    defaults={
-                        'first_name': first_name,
-                        'last_name': last_name,
-                        'birthdate': birthdate,
-                    }
-                )
-                inserted += 1 if created else 0
-                updated += 0 if created else 1
-
-                if card_number:
-                    CreditCard.objects.update_or_create(
-                        card_number=card_number,
-                        source=source,
-                        defaults={'person': person}
-                    )
-
-                if mobile_raw:
-                    mobiles = mobile_raw.split('|')
-                    for mobile in mobiles:
-                        mobile = ''.join(ch for ch in mobile if ch.isdigit())
-                        if mobile:
-                            if mobile[0] != '0':
-                                mobile = '0' + mobile
-                            PhoneNumber.objects.update_or_create(
-                                number=mobile,
-                                person=person,
-                                source=source,
-                                defaults={}
-                            )
-        
-        # Update processed chunks
-        job.processed_chunks += 1
-        if job.processed_chunks >= job.total_chunks:
-            job.status = ImportJobStatus.COMPLETED
-        job.save()
+            counted = ImportJob.objects.select_for_update().only('processed_chunks', 'total_chunks', 'status').get(id=job.id)
+            counted.processed_chunks += 1
+            counted.save(update_fields=['processed_chunks', 'updated_at'])
+        # total_chunks stays 0 until import_chunks has published every chunk
+        if counted.processed_chunks == counted.total_chunks and counted.status == ImportJobStatus.PROCESSING:
+            finish_job(job)
         
     except Exception as e:
-        job.status = ImportJobStatus.FAILED
-        job.error_message = str(e)
-        job.save()
+        metrics.CHUNKS_PROCESSED.labels(source=source, status='failed').inc()
+        # Only the first failure of a running job cleans up; a finished job
+        # keeps its status and its swapped-in data
+        failed = ImportJob.objects.filter(id=job.id, status=ImportJobStatus.PROCESSING).update(
+            status=ImportJobStatus.FAILED, error_message=str(e), updated_at=timezone.now()
+        )
+        if failed and job.mode == ImportMode.REPLACE:
+            # A partial load must never be swapped in
+            partitions.drop_staging(source, job.id)
+        elif failed and job.defer_indexes:
+            # Whatever was written stays; searches need their indexes back
+            indexes.rebuild_deferrable_indexes()
         raise
+    finally:
+        metrics.CHUNKS_IN_FLIGHT.dec()
+
+# Seconds between queue depth / in-flight job samples
+QUEUE_METRICS_INTERVAL = 15
+
+def _record_queue_metrics(channel):
+    close_old_connections()
+    try:
+        # Passive declare only reads the queue's current message count
+        metrics.QUEUE_DEPTH.set(
+            channel.queue_declare(queue='import_queue', durable=True, passive=True).method.message_count
+        )
+        metrics.JOBS_IN_FLIGHT.set(ImportJob.objects.filter(status=ImportJobStatus.PROCESSING).count())
+    except Exception as e:
+        print(f"Error recording queue metrics: {e}")
+
+def _schedule_queue_metrics(connection, channel):
+    # Sampled on a timer rather than per message: a passive declare and a COUNT
+    # per chunk add up once chunks are small. call_later runs on the consuming
+    # thread, which pika requires
+    def sample():
+        _record_queue_metrics(channel)
+        connection.call_later(QUEUE_METRICS_INTERVAL, sample)
+    sample()
 
 def start_rabbitmq_consumer():
     credentials = pika.PlainCredentials(
@@ -119,6 +235,9 @@ def start_rabbitmq_consumer():
     channel.queue_declare(queue='import_queue', durable=True)
     
     def callback(ch, method, properties, body):
+        # The consumer lives outside Django's request cycle, so recycle expired or
+        # broken connections here (honours CONN_MAX_AGE and CONN_HEALTH_CHECKS)
+        close_old_connections()
         try:
             chunk_data = json.loads(body)
             process_chunk(chunk_data)
@@ -128,5 +247,6 @@ def start_rabbitmq_consumer():
     
     channel.basic_qos(prefetch_count=1)
     channel.basic_consume(queue='import_queue', on_message_callback=callback)
+    _schedule_queue_metrics(connection, channel)
     print(' [*] Waiting for messages. To exit press CTRL+C')
     channel.start_consuming()
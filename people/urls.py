@@ -1,12 +1,23 @@
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
-from .views import PersonViewSet, CreditCardViewSet, PhoneNumberViewSet
+from .views import PersonViewSet, CreditCardViewSet, PhoneNumberViewSet, PersonIdentityViewSet
+from . import async_views
 
 router = DefaultRouter()
 router.register(r'users', PersonViewSet, basename='person')
 router.register(r'credit-cards', CreditCardViewSet, basename='creditcard')
 router.register(r'phone-numbers', PhoneNumberViewSet, basename='phonenumber')
+router.register(r'identities', PersonIdentityViewSet, basename='personidentity')
+
+# Async lookups by identifier, for bursts of single-key reads under ASGI
+lookup_patterns = [
+	re_path(r'^people/(?P<national_code>[0-9]{1,10})/$', async_views.person_lookup, name='lookup-person'),
+	re_path(r'^cards/(?P<card_number>[0-9]{1,16})/$', async_views.card_lookup, name='lookup-card'),
+	re_path(r'^phones/(?P<number>[0-9]{1,15})/$', async_views.phone_lookup, name='lookup-phone'),
+	re_path(r'^identities/(?P<national_code>[0-9]{1,10})/$', async_views.identity_lookup, name='lookup-identity'),
+]
 
 urlpatterns = [
+	path('lookup/', include(lookup_patterns)),
 	path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,22 +1,168 @@
+import hashlib
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import AllowAny
-from .models import Person, CreditCard, PhoneNumber
-from .serializers import PersonSerializer, CreditCardSerializer, PhoneNumberSerializer
+from rest_framework.response import Response
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+from rest_framework.utils.urls import replace_query_param
+from . import changes
+from .filters import PersonFilter, CreditCardFilter, PhoneNumberFilter, PersonIdentityFilter
+from .models import Person, CreditCard, PhoneNumber, PersonIdentity
+from .serializers import (
+	PersonSerializer, CreditCardSerializer, PhoneNumberSerializer, PersonIdentitySerializer, represent_datetimes,
+)
 
 
-class PersonViewSet(viewsets.ModelViewSet):
+class FastReadMixin:
+	"""
+	Serve list/retrieve straight from ``.values()`` rows instead of running the
+	ModelSerializer field by field. Keys come from the serializer's ``Meta.fields``
+	and datetimes are formatted by its fields, so the JSON is unchanged;
+	create/update still go through the serializer.
+
+	Both answer with an ETag computed from the rows, and with 304 Not Modified
+	to a matching If-None-Match, before anything is rendered.
+	"""
+
+	# Row keys the ETag is computed from; None hashes whole rows
+	etag_fields = None
+
+	def get_read_fields(self):
+		return self.get_serializer_class().Meta.fields
+
+	def get_read_queryset(self):
+		return self.filter_queryset(self.get_queryset()).values(*self.get_read_fields())
+
+	def list(self, request, *args, **kwargs):
+		queryset = self.get_read_queryset()
+		page = self.paginate_queryset(queryset)
+		if page is not None:
+			rows = list(page)
+			etag = self.get_etag(rows, self.paginator.page.paginator.count)
+			return self.conditional_response(
+				request, etag, lambda: self.get_paginated_response(self.represent(rows))
+			)
+		rows = ReturnList(queryset, serializer=None)
+		return self.conditional_response(request, self.get_etag(rows), lambda: Response(self.represent(rows)))
+
+	def retrieve(self, request, *args, **kwargs):
+		lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+		row = get_object_or_404(self.get_read_queryset(), **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+		self.check_object_permissions(request, row)
+		return self.conditional_response(
+			request, self.get_etag([row]), lambda: Response(ReturnDict(self.represent([row])[0], serializer=None))
+		)
+
+	def represent(self, rows):
+		return represent_datetimes(self.get_serializer_class(), rows)
+
+	def get_etag(self, rows, *extra):
+		digest = hashlib.md5(repr((self.get_read_fields(), extra)).encode(), usedforsecurity=False)
+		for row in rows:
+			values = row.values() if self.etag_fields is None else [row[field] for field in self.etag_fields]
+			digest.update(repr(tuple(values)).encode())
+		return f'"{digest.hexdigest()}"'
+
+	def conditional_response(self, request, etag, build_response):
+		if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+		if etag in if_none_match or '*' in if_none_match:
+			response = HttpResponseNotModified()
+		else:
+			response = build_response()
+		response['ETag'] = etag
+		return response
+
+
+class ChangeTrackingMixin:
+	"""
+	For models with a change version (see people.changes): ETags from
+	(id, version) alone, and a ``changes/?since=<version>`` delta listing with
+	the rows changed and deleted since then. The viewset's filters apply.
+	"""
+
+	etag_fields = ('id', 'version')
+
+	@action(detail=False, methods=['get'])
+	def changes(self, request, *args, **kwargs):
+		since = self._int_param(request, 'since', required=True)
+		# -1 is a page that stopped on a source-wide tombstone (no object id)
+		after = self._int_param(request, 'after', minimum=-1)
+		limit = min(self._int_param(request, 'limit') or changes.PAGE_SIZE, changes.MAX_PAGE_SIZE)
+		rows, deleted, (version, after) = changes.read_changes(
+			self.filter_queryset(self.get_queryset()),
+			self.get_read_fields(),
+			since,
+			after=after,
+			limit=limit,
+			source=request.query_params.get('source') or None,
+		)
+		next_url = None
+		if after is not None:
+			next_url = replace_query_param(request.build_absolute_uri(), 'since', version)
+			next_url = replace_query_param(next_url, 'after', after)
+		return Response({
+			'next': next_url,
+			'version': version,
+			'results': self.represent(rows),
+			'deleted': deleted,
+		})
+
+	def perform_update(self, serializer):
+		super().perform_update(serializer)
+		# The trigger moved the version on; answer with the stored one
+		serializer.instance.refresh_from_db(fields=['version', 'updated_at'])
+
+	@staticmethod
+	def _int_param(request, name, required=False, minimum=0):
+		value = request.query_params.get(name)
+		if value is None or value == '':
+			if required:
+				raise ValidationError({name: ['This parameter is required.']})
+			return None
+		try:
+			value = int(value)
+		except ValueError:
+			value = None
+		if value is None or value < minimum:
+			raise ValidationError({name: [f'An integer of at least {minimum} is required.']})
+		return value
+
+
+class PersonViewSet(ChangeTrackingMixin, FastReadMixin, viewsets.ModelViewSet):
 	queryset = Person.objects.all().order_by('id')
 	serializer_class = PersonSerializer
 	permission_classes = [AllowAny]
+	filter_backends = [DjangoFilterBackend]
+	filterset_class = PersonFilter
 
 
-class CreditCardViewSet(viewsets.ModelViewSet):
+class CreditCardViewSet(ChangeTrackingMixin, FastReadMixin, viewsets.ModelViewSet):
 	queryset = CreditCard.objects.all().order_by('id')
 	serializer_class = CreditCardSerializer
 	permission_classes = [AllowAny]
+	filter_backends = [DjangoFilterBackend]
+	filterset_class = CreditCardFilter
 
 
-class PhoneNumberViewSet(viewsets.ModelViewSet):
+class PhoneNumberViewSet(ChangeTrackingMixin, FastReadMixin, viewsets.ModelViewSet):
 	queryset = PhoneNumber.objects.all().order_by('id')
 	serializer_class = PhoneNumberSerializer
-	permission_classes = [AllowAny]
\ No newline at end of file
+	permission_classes = [AllowAny]
+	filter_backends = [DjangoFilterBackend]
+	filterset_class = PhoneNumberFilter
+
+
+class PersonIdentityViewSet(FastReadMixin, viewsets.ReadOnlyModelViewSet):
+	"""Cross-bank view of a national code; a lookup is one primary-key hit."""
+	queryset = PersonIdentity.objects.all().order_by('national_code')
+	serializer_class = PersonIdentitySerializer
+	permission_classes = [AllowAny]
+	filter_backends = [DjangoFilterBackend]
+	filterset_class = PersonIdentityFilter
+	lookup_field = 'national_code'
+	lookup_value_regex = r'\d{1,10}'
\ No newline at end of file